@@ -1,10 +1,24 @@
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame
+import logging
 import math
 import random
 import time
 
+import simulation
+from assets import Assets
+from pipeline import SimulationWorker
+from profiler import Profiler, ProfilerOverlay, percentile
+from renderer import Renderer
+from replay import Recorder
+from scores import Run, ScoreStore
+from splash import SplashFrames
+from starfield import StarField
+from text import FONT_PATH, text_cache
+
+logger = logging.getLogger(__name__)
+
 def format_number(num):
     if num < 1000:
         return num
@@ -32,7 +46,7 @@ class Label:
     def __init__(self, x, y, text, font_size, text_colour=(0, 0, 0), antialias=True, fill_colour=(150, 150, 150),
                  outline_colour=(0, 0, 0)):
         self.position = pygame.Vector2(x, y)
-        self.font = pygame.font.Font("textures/MontserratBlack-ZVK6J.otf", font_size)
+        self.font_size = font_size
         self.text_colour = text_colour
         self.antialias = antialias
         self.fill_colour = fill_colour
@@ -46,7 +60,7 @@ class Label:
         max_width = 0
         max_height = 0
         for line in text:
-            text_surface = self.font.render(line, self.antialias, self.text_colour)
+            text_surface = text_cache.render(FONT_PATH, self.font_size, line, self.antialias, self.text_colour)
             width = text_surface.get_width()
             height = text_surface.get_height()
             out.append((text_surface, width, height))
@@ -55,10 +69,11 @@ class Label:
         return out, max_width, max_height
 
     def update(self, delta, new_text=None, x=None, y=None, width=None, height=None, colour=None, font_size=None):
-        if new_text is not None:
-            self.text, self.width, self.height = self.create_text(new_text)
-        if font_size is not None:
-            self.font = pygame.font.Font("textures/MontserratBlack-ZVK6J.otf", font_size)
+        if new_text is not None and new_text != self.raw_text:
+            self.raw_text = new_text
+            self.text, self.width, self.height = self.create_text(self.raw_text)
+        if font_size is not None and font_size != self.font_size:
+            self.font_size = font_size
             self.text, self.width, self.height = self.create_text(self.raw_text)
         if x is not None:
             self.position.x = x
@@ -95,6 +110,12 @@ class Label:
             surface.blit(text_surface, self.position - self.centering + pygame.Vector2(0, prev_height))
             prev_height += height
 
+    def get_rect(self):
+        return pygame.Rect(
+            self.position - pygame.Vector2(self.horizontal_padding, self.vertical_padding) - self.centering,
+            pygame.Vector2(self.width + 2 * self.horizontal_padding,
+                           self.height + self.vertical_padding * 2)).inflate(2, 2)
+
 
 class Button(Label):
 
@@ -104,7 +125,7 @@ class Button(Label):
                          outline_colour=outline_colour)
 
     def is_touching_mouse_pointer(self):
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+        mouse_x, mouse_y = renderer.to_logical(pygame.mouse.get_pos())
         if (self.position.x - self.centering.x <= mouse_x <= self.position.x + self.width - self.centering.x
                 and self.position.y - self.centering.y <= mouse_y <= self.position.y + self.height - self.centering.y):
             return True
@@ -169,227 +190,274 @@ class Rectangle:
 
 
 class Player:
-    width = 40
-    height = 40
-    gravity = 0.0180
-    jump_strength = 0.35
-    speed = 0.215
-    jump_cooldown_length = 0
-    path = "textures/Among us bird/Layer 1_bird_updated_"
+    __slots__ = ("body", "x", "y", "previous_x", "previous_y", "current_frame", "test", "frame", "flipped", "bird",
+                 "display_bird", "direction", "help_label", "help_time")
+    width = simulation.Player.width
+    height = simulation.Player.height
+    path = "Among us bird/Layer 1_bird_updated_"
     frames = []
     for i in range(1, 5):
-        frames.append(pygame.image.load(path + str(i) + ".png"))
-    bird = frames[0]
-    crop = 2 * 40 / bird.get_width() * 1.75
-    bird = pygame.transform.scale(bird, (width, height))
+        frames.append(path + str(i))
 
-    def __init__(self, x, y):
-        self.position = pygame.Vector2(x, y)
-        self.velocity = pygame.Vector2(0, 0)
-        self.jump_cooldown = 200
-        self.collision_rect = pygame.Rect(self.position.x - self.width / 2,
-                                          (self.position.y - self.height / 2 + self.crop), self.width,
-                                          self.height - 2 * self.crop)
-        self.distance = 0
+    def __init__(self, body):
+        self.body = body
+        self.x = self.previous_x = body.x
+        self.y = self.previous_y = body.y
         self.current_frame = 0
         self.test = 0
+        self.frame = self.frames[0]
+        self.flipped = False
+        self.bird = assets.get(self.frame, (self.width, self.height))
         self.display_bird = self.bird
         self.direction = 0
-        self.no_jump = 0
         self.help_label = Label(SCREEN_WIDTH/2, SCREEN_HEIGHT*4/5, ["Press SPACE to jump"], 20, (230,230,230))
+        # the bob follows game time rather than the wall clock, so the same run always draws the same frames
+        self.help_time = 0
 
-    def update(self, delta, is_game_over):
-        self.velocity *= self.no_jump
-        if self.no_jump == 0:
-            self.help_label.update(delta, y=SCREEN_HEIGHT * 4 /5 + 20 * math.sin(1.5 * time.time()))
+    def update(self, delta):
+        if self.body.no_jump == 0:
+            self.help_time += delta
+            self.help_label.update(delta, y=SCREEN_HEIGHT * 4 /5 + 20 * math.sin(1.5 * self.help_time / 1000))
         self.test += delta
-        self.jump_cooldown -= delta
 
         if self.test > 500 / len(self.frames):
-            self.bird = self.frames[self.current_frame]
-            self.bird = pygame.transform.scale(self.bird, (self.width, self.height))
+            self.frame = self.frames[self.current_frame]
+            self.flipped = self.body.velocity_x < 0
+            self.bird = assets.get(self.frame, (self.width, self.height), self.flipped, self.flipped)
             self.current_frame += 1
             self.current_frame %= len(self.frames)
             self.test = 0
-            if self.velocity.x < 0:
-                self.bird = pygame.transform.flip(self.bird, True, True)
 
         self.display_bird = self.bird
-        if self.velocity.y > 0.25:
-            self.display_bird = pygame.transform.rotate(self.bird, self.direction)
-            self.collision_rect = self.display_bird.get_rect(center=self.bird.get_rect(topleft=self.position).center)
+        if self.body.velocity_y > 0.25:
+            self.display_bird = assets.get_rotated(self.frame, self.direction, (self.width, self.height),
+                                                   self.flipped, self.flipped)
             self.direction -= delta / 16
             self.direction = max(self.direction, -70)
         else:
             self.display_bird = self.bird
             self.direction = 0
 
-        if not is_game_over:
-            pressed = pygame.key.get_pressed()
-            if pressed[pygame.K_SPACE] and self.jump_cooldown <= 0:
-                self.jump()
-
-        if self.is_out_of_bounds():
-            return False
-
-        self.position.x += self.velocity.x * delta
-        for wall in game.wall_manager.walls:
-            for collision_rect in wall.collision_rects:
-                if self.is_colliding(collision_rect):
-                    if self.position.x < wall.position.x + wall.width:
-                        self.position.x = wall.position.x - self.width
-                    else:
-                        self.position.x = wall.position.x + wall.width + self.width
-                    self.velocity.x *= -1
-                    return False
-        self.position.y += self.velocity.y * delta
-        for wall in game.wall_manager.walls:
-            for collision_rect in wall.collision_rects:
-                if self.is_colliding(collision_rect):
-                    if self.position.y < collision_rect.y + collision_rect.height:
-                        self.position.y = collision_rect.y - self.height
-                    else:
-                        self.position.y = collision_rect.y + collision_rect.height + self.height
-                    self.velocity.y *= -1
-                    return False
-
-        self.velocity.y += self.gravity
-        return True
-
-    def is_out_of_bounds(self):
-        if self.position.y + self.height < 0 or self.position.y - self.height > SCREEN_HEIGHT:
-            return True
-        return False
+    def remember(self):
+        self.previous_x = self.body.x
+        self.previous_y = self.body.y
 
-    def is_colliding(self, rect):
-        self.collision_rect = pygame.Rect(self.position.x - self.width / 2,
-                                          self.position.y - self.height / 2 + self.crop, self.width,
-                                          self.height - 2 * self.crop)
-        if rect.colliderect(self.collision_rect):
-            return True
-        return False
+    def follow(self, body):
+        self.body = body
+        self.previous_x = getattr(body, "previous_x", body.x)
+        self.previous_y = getattr(body, "previous_y", body.y)
 
-    def jump(self):
-        self.no_jump = 1
-        self.velocity.y = -self.jump_strength
-        self.jump_cooldown = self.jump_cooldown_length
+    def interpolate(self, alpha):
+        self.x = self.previous_x + (self.body.x - self.previous_x) * alpha
+        self.y = self.previous_y + (self.body.y - self.previous_y) * alpha
 
     def draw(self, surface):
-        # # pygame.draw.rect(surface, (255,255,0), self.collision_rect)
-        surface.blit(self.display_bird, self.position - pygame.Vector2(self.width / 2, self.height / 2))
-        if self.no_jump == 0:
-            self.help_label.draw(screen)
+        # # pygame.draw.rect(surface, (255,255,0), self.body.collision_rect)
+        surface.blit(self.display_bird, (self.x - self.width / 2, self.y - self.height / 2))
+        if self.body.no_jump == 0:
+            self.help_label.draw(surface)
+
+    def dirty_rects(self):
+        rects = [self.display_bird.get_rect(topleft=(self.x - self.width / 2,
+                                                     self.y - self.height / 2)).inflate(2, 2)]
+        if self.body.no_jump == 0:
+            rects.append(self.help_label.get_rect())
+        return rects
 
 
 class Wall:
+    __slots__ = ("body", "pipe", "end_pipe", "flipped_end_pipe", "column_key", "x", "previous_x", "previous_resets",
+                 "bottom_column", "top_column")
     fill_colour = (0, 255, 0)
-    hole_height = Player.height * 1.5
-    width = Player.width
-    pipe = pygame.image.load("textures/pipe.png")
-    pipe = pygame.transform.scale(pipe, (width, width))
-    end_pipe = pygame.image.load("textures/pipe_top.png")
-    end_pipe = pygame.transform.scale(end_pipe, (width, width))
-
-    def __init__(self, x, hole_y):
-        self.position = pygame.Vector2(x, -Player.height)
-        self.hole_y = hole_y
-        self.collision_rects = [pygame.Rect(self.position.x, self.position.y, self.width, self.hole_y),
-                                pygame.Rect(self.position.x, self.hole_y + self.hole_height, self.width,
-                                            SCREEN_HEIGHT - (
-                                                    self.hole_y + self.hole_height) + self.end_pipe.get_height())]
-        self.centering = pygame.Vector2(0, 0)
-        self.score_award = 1
-
-    def update(self, delta, x):
-        self.position.x -= x * delta
-        self.collision_rects = [pygame.Rect(self.position.x, self.position.y, self.width, self.hole_y),
-                                pygame.Rect(self.position.x, self.hole_y + self.hole_height, self.width,
-                                            SCREEN_HEIGHT - (self.hole_y + self.hole_height) + Player.height)]
-
-    def reset(self):
-        self.position.x += SCREEN_WIDTH * 2
-        self.hole_y = random.randint(round(self.hole_height * 0.5) + self.end_pipe.get_height() + Player.height,
-                                     round(SCREEN_HEIGHT - self.hole_height * 1.5))
-        self.score_award = 1
-
-    def award_score(self):
-        game.score += self.score_award
-        self.score_award = 0
+    width = simulation.Wall.width
+
+    def __init__(self, body):
+        self.body = body
+        self.pipe = assets.get("pipe", (self.width, self.width))
+        self.end_pipe = assets.get("pipe_top", (self.width, self.width))
+        self.flipped_end_pipe = assets.get("pipe_top", (self.width, self.width), flip_y=True)
+        self.column_key = None
+        self.x = self.previous_x = body.x
+        self.previous_resets = body.resets
+
+    def remember(self):
+        self.previous_x = self.body.x
+        self.previous_resets = self.body.resets
+
+    def follow(self, body):
+        self.body = body
+        self.previous_x = getattr(body, "previous_x", body.x)
+        self.previous_resets = getattr(body, "previous_resets", body.resets)
+
+    def interpolate(self, alpha):
+        # a respawn teleports the wall, there is nothing to blend between
+        if self.body.resets != self.previous_resets:
+            self.x = self.body.x
+        else:
+            self.x = self.previous_x + (self.body.x - self.previous_x) * alpha
 
-    def draw(self, surface):
-        # for r in self.collision_rects:
-        #     pygame.draw.rect(surface, self.fill_colour, r)
-        r = self.collision_rects[1]
-        surface.blit(self.end_pipe, (r.x, r.y))
+    def bake_columns(self):
+        # a column only depends on the gap, so it is stacked once per spawn/reset instead of tile by tile every frame
+        top, bottom = self.body.collision_rects
+        parts = [(self.end_pipe, bottom.y)]
         for i in range(SCREEN_HEIGHT // self.pipe.get_height()):
-            if r.y + i * self.pipe.get_height() > SCREEN_HEIGHT:
+            if bottom.y + i * self.pipe.get_height() > SCREEN_HEIGHT:
                 break
-            surface.blit(self.pipe, (r.x, r.y + self.end_pipe.get_height() + i * self.pipe.get_height()))
-        transformed_end_pipe = pygame.transform.flip(self.end_pipe, False, True)
-        r = self.collision_rects[0]
-        surface.blit(transformed_end_pipe, (r.x, r.y + r.height - transformed_end_pipe.get_width()))
+            parts.append((self.pipe, bottom.y + self.end_pipe.get_height() + i * self.pipe.get_height()))
+        self.bottom_column = self.stack(parts)
+        parts = [(self.flipped_end_pipe, top.y + top.height - self.flipped_end_pipe.get_width())]
         for i in range(1, SCREEN_HEIGHT // self.pipe.get_height()):
-            if r.y + r.height - i * self.pipe.get_height() < 0:
+            if top.y + top.height - i * self.pipe.get_height() < 0:
                 break
-            surface.blit(self.pipe,
-                         (r.x, r.y + r.height - transformed_end_pipe.get_height() - i * self.pipe.get_height()))
+            parts.append((self.pipe,
+                          top.y + top.height - self.flipped_end_pipe.get_height() - i * self.pipe.get_height()))
+        self.top_column = self.stack(parts)
+        self.column_key = (top.y, top.height, bottom.y)
+
+    def stack(self, parts):
+        top = min(y for _, y in parts)
+        bottom = max(y + part.get_height() for part, y in parts)
+        column = pygame.Surface((self.width, bottom - top), pygame.SRCALPHA)
+        for part, y in parts:
+            column.blit(part, (0, y - top))
+        return assets.convert(column), top
+
+    def draw(self, surface):
+        # for r in self.body.collision_rects:
+        #     pygame.draw.rect(surface, self.fill_colour, (r.x, r.y, r.width, r.height))
+        top, bottom = self.body.collision_rects
+        if self.column_key != (top.y, top.height, bottom.y):
+            self.bake_columns()
+        column, y = self.bottom_column
+        surface.blit(column, (int(self.x), y))
+        column, y = self.top_column
+        surface.blit(column, (int(self.x), y))
+
+    def dirty_rect(self):
+        return pygame.Rect(int(self.x), 0, self.width, SCREEN_HEIGHT)
 
 
 class WallManager:
 
-    def __init__(self):
-        self.wall_separation_distance = SCREEN_WIDTH / 2
-        self.starting_position = SCREEN_WIDTH * 1.1
-        self.walls = []
-        for i in range(math.floor(SCREEN_WIDTH * 2/ self.wall_separation_distance)):
-            self.walls.append(Wall(self.starting_position + self.wall_separation_distance * i,
-                                   random.randint(round(Wall.hole_height * 0.5) + Player.height + Player.height,
-                                              round(SCREEN_HEIGHT - Wall.hole_height * 1.5))))
+    def __init__(self, body):
+        self.body = body
+        self.walls = [Wall(wall) for wall in self.body.walls]
 
+    def remember(self):
+        for wall in self.walls:
+            wall.remember()
+
+    def follow(self, bodies):
+        for wall, body in zip(self.walls, bodies):
+            wall.follow(body)
 
-    def update(self, delta, slow_down_effect):
+    def interpolate(self, alpha):
         for wall in self.walls:
-            wall.update(delta, Player.speed * slow_down_effect * game.player.no_jump)
-            if wall.position.x + wall.width < 0:
-                wall.reset()
-            if game.player.position.x > wall.position.x + wall.width:
-                wall.award_score()
+            wall.interpolate(alpha)
 
     def draw(self, surface):
         for wall in self.walls:
             wall.draw(surface)
 
+    def dirty_rects(self):
+        return [wall.dirty_rect() for wall in self.walls]
 
-class Game:
 
-    def __init__(self):
-        self.wall_manager = WallManager()
-        self.player = Player(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
-        self.score = 0
+class Game:
+    tick_length = simulation.Simulation.tick_length
+    max_ticks_per_frame = 10
+
+    def __init__(self, seed=None, curve=simulation.DEFAULT_CURVE):
+        self.simulation = simulation.Simulation(seed, curve)
+        self.recorder = Recorder(self.simulation.seed, curve)
+        self.wall_manager = WallManager(self.simulation.wall_manager)
+        self.player = Player(self.simulation.player)
+        self.score = self.simulation.score
         self.score_label = Label(SCREEN_WIDTH, 0, [f"Score: {format_number(self.score)}"], 20, (200, 200, 200),
                                  fill_colour=(50, 50, 50), outline_colour=(0, 0, 0))
-        self.is_game_over = False
-        self.slow_down_effect = 1.0
-        self.background = Background((15, 15, 15))
-
-    def update(self, delta):
+        # a sky of its own from the seed, so a seed pins down every frame and not just the course
+        self.background = Background((15, 15, 15), random.Random(self.simulation.seed))
+        self.accumulator = 0
+        self.frame_times = []
+        self.started = time.perf_counter()
+        # when pipelined the ticks for the next frame run on a worker thread while this one is drawn
+        self.worker = None
+        if PIPELINED:
+            self.toggle_pipeline()
+
+    def toggle_pipeline(self):
+        if self.worker is None:
+            self.worker = SimulationWorker(self.simulation, self.advance)
+            return
+        self.worker.close()
+        self.worker = None
+        self.player.follow(self.simulation.player)
+        self.wall_manager.follow(self.simulation.wall_manager.walls)
+
+    def remember(self):
+        self.player.remember()
+        self.wall_manager.remember()
+
+    def advance(self, delta, pressed, remember):
+        # the simulation always advances in whole ticks, drawing blends between the last two of them
+        self.accumulator += delta
+        ticks = 0
+        while self.accumulator >= self.tick_length and not self.simulation.is_finished:
+            if ticks == self.max_ticks_per_frame:
+                self.accumulator = 0
+                break
+            remember()
+            self.recorder.record(self.tick_length, pressed[pygame.K_SPACE])
+            self.simulation.step(self.tick_length, pressed[pygame.K_SPACE])
+            self.accumulator -= self.tick_length
+            ticks += 1
+        return self.accumulator / self.tick_length
+
+    def update(self, delta, pressed=None):
+        self.frame_times.append(delta)
         self.background.update(delta)
-        self.wall_manager.update(delta, self.slow_down_effect)
-        self.score_label.update(delta, new_text=[f"Score: {format_number(self.score)}"],
-                                x=SCREEN_WIDTH - self.score_label.width - Label.horizontal_padding,
+        if pressed is None:
+            pressed = pygame.key.get_pressed()
+        if self.worker is None:
+            alpha = self.advance(delta, pressed, self.remember)
+            score, is_finished = self.simulation.score, self.simulation.is_finished
+        else:
+            # input read now reaches the screen one frame later, in exchange the ticks never stall the draw
+            snapshot = self.worker.swap()
+            if not snapshot.is_finished:
+                self.worker.submit(delta, pressed)
+            self.player.follow(snapshot.player)
+            self.wall_manager.follow(snapshot.walls)
+            alpha, score, is_finished = snapshot.alpha, snapshot.score, snapshot.is_finished
+        self.player.interpolate(alpha)
+        self.wall_manager.interpolate(alpha)
+        if self.score != score:
+            self.score = score
+            self.score_label.update(delta, new_text=[f"Score: {format_number(self.score)}"])
+        self.score_label.update(delta, x=SCREEN_WIDTH - self.score_label.width - Label.horizontal_padding,
                                 y=Label.vertical_padding)
-        if not self.player.update(delta, self.is_game_over):
-            if not self.is_game_over:
-                self.game_over()
-        if self.is_game_over:
-            self.slow_down_effect /= delta
-            if self.player.is_out_of_bounds():
-                global game
-                game = GameOverScreen(self.score)
-
-    def game_over(self):
-        self.player.velocity.x = -Player.speed
-        self.is_game_over = True
+        self.player.update(delta)
+        if is_finished:
+            if self.worker is not None:
+                self.worker.close()
+                self.worker = None
+            self.recorder.finish(self.score)
+            if REPLAY_DIRECTORY is not None:
+                path = os.path.join(REPLAY_DIRECTORY, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.simulation.seed}.replay")
+                try:
+                    self.recorder.save(path)
+                except OSError as error:
+                    # a replay is a nice to have, a folder that can't take one must not end the game
+                    logger.warning("couldn't save the replay %s: %s", path, error)
+            global game
+            game = GameOverScreen(self.score)
+            scores.record(self.run_stats())
+
+    def run_stats(self):
+        frame_times = sorted(self.frame_times)
+        return Run(self.simulation.seed, self.score, self.simulation.frames, self.simulation.time,
+                   time.perf_counter() - self.started, sum(frame_times) / len(frame_times),
+                   percentile(frame_times, 0.95), "game")
 
     def draw(self, screen):
         self.background.draw(screen)
@@ -397,12 +465,24 @@ class Game:
         self.score_label.draw(screen, centered_y=False, centered_x=False)
         self.player.draw(screen)
 
+    def draw_dirty(self, screen, previous):
+        # only what moved last frame and the stars that twinkled get restored from the background layer
+        changed = self.background.stars.take_changed_rects()
+        self.background.draw(screen, previous + changed)
+        self.wall_manager.draw(screen)
+        self.score_label.draw(screen, centered_y=False, centered_x=False)
+        self.player.draw(screen)
+        return self.dirty_rects(), changed
+
+    def dirty_rects(self):
+        return self.wall_manager.dirty_rects() + [self.score_label.get_rect()] + self.player.dirty_rects()
+
 
 class GameOverScreen:
 
     def __init__(self, score):
         self.score = score
-        global highest_score
+        highest_score = scores.highest()
         self.game_over_card = Rectangle(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2, SCREEN_WIDTH * 2 / 3,
                                         SCREEN_HEIGHT * 4 / 5, (50, 50, 50))
         self.title = Label(SCREEN_WIDTH / 2, self.game_over_card.height / 5, [f"Game Over!"], 50,
@@ -421,7 +501,6 @@ class GameOverScreen:
         self.play_again = Button(SCREEN_WIDTH / 2,
                                  (self.game_over_card.position.y + self.game_over_card.height / 2) * 4 / 5,
                                  [f"   Play Again   "], 25, fill_color=(0, 0, 0), text_colour=(50, 50, 50))
-        highest_score = max(highest_score, self.score)
         self.cooldown = 200
 
     def update(self, delta):
@@ -448,33 +527,32 @@ class GameOverScreen:
         self.play_again.draw(surface, outlined=True, filled=True)
 
 
-def sort_files(lis):
-    out = []
-    for item in lis:
-        item = item[4:-4]
-        out.append(int(item))
-    return sorted(out)
-
-
 class Start:
+    scale = 5
 
-    def __init__(self, path, game_name):
+    def __init__(self, path, game_name, loader=None):
         self.path = path
-        self.directory = os.listdir(self.path)
-        self.num = sort_files(self.directory)
+        # frames are decoded and scaled on a background thread a few ahead of playback instead of all at startup
+        self.frames = SplashFrames(self.path, self.scale, SPLASH_PACK)
         self.current_frame = 0
         self.current_file = None
+        self.drawn_file = None
         self.game_name = game_name
+        # game assets are prepared a step per frame while the logo plays
+        self.loader = loader
 
     def update(self, delta):
-        if self.current_frame >= len(self.directory) - 1:
+        if self.loader is not None and next(self.loader, None) is None:
+            self.loader = None
+        if self.current_frame >= len(self.frames) - 1:
+            self.frames.close()
+            if self.loader is not None:
+                for _ in self.loader:
+                    pass
             pygame.time.wait(750)
             global game
             game = self.game_name()
-        self.current_file = pygame.image.load(
-            self.path + "/bruh" + str(self.num[math.floor(self.current_frame)]) + ".png")
-        self.current_file = pygame.transform.scale(self.current_file, (
-            self.current_file.get_width() * 5, self.current_file.get_height() * 5))
+        self.current_file = self.frames.get(math.floor(self.current_frame))
         self.current_frame += 1.25 / delta
 
     def draw(self, surface):
@@ -482,83 +560,151 @@ class Start:
         surface.blit(self.current_file, (
             SCREEN_WIDTH / 2 - self.current_file.get_width() / 2,
             SCREEN_HEIGHT / 2 - self.current_file.get_height() / 2))
-
-
-class Star:
-
-    def __init__(self, x, y, size):
-        self.position = pygame.Vector2(x, y)
-        self.radius = size / 2
-        self.colour = [200, 200, 200]
-        self.n = random.random() * 365000
-
-    def update(self, delta):
-        # x = int(random.randint(-1,1) * random.random() * delta / 2)
-        x = round(75 * math.sin(self.n / 1000) + 180)
-        for i in range(3):
-            self.colour[i] = x
-        self.n += delta
-
-    def draw(self, screen):
-        # print(self.colour)
-        pygame.draw.circle(screen, self.colour, self.position, self.radius)
+        self.drawn_file = self.current_file
+
+    def draw_dirty(self, surface, previous):
+        # the logo holds each frame for several updates, only a new one has to be drawn and scaled
+        if self.current_file is self.drawn_file:
+            return [], []
+        self.draw(surface)
+        return [], [surface.get_rect()]
+
+    def dirty_rects(self):
+        return []
+
+
+def prepare_assets(loaded):
+    for frame in Player.frames:
+        loaded.prepare_rotations(frame, (Player.width, Player.height))
+        yield frame
+        loaded.prepare_rotations(frame, (Player.width, Player.height), True, True)
+        yield frame
+    loaded.prepare("pipe", (Wall.width, Wall.width))
+    loaded.prepare("pipe_top", (Wall.width, Wall.width))
+    loaded.prepare("pipe_top", (Wall.width, Wall.width), flip_y=True)
+    yield "pipe"
+
+
+def install_profiler(profiler):
+    for owner, name in ((Game, "update"), (Game, "draw"), (Game, "draw_dirty"), (Background, "update"),
+                        (Background, "draw"), (WallManager, "draw"), (Player, "update"), (Player, "draw"),
+                        (Label, "update"), (Label, "draw"), (Start, "update"), (Start, "draw"),
+                        (GameOverScreen, "update"), (GameOverScreen, "draw")):
+        profiler.instrument(owner, name, f"{owner.__name__}.{name}")
+    profiler.instrument(simulation.Simulation, "step", "Simulation.step")
+    profiler.instrument(simulation.WallManager, "update", "WallManager.update")
+    profiler.instrument(simulation.Player, "update", "Player.physics")
 
 
 class Background:
 
-    def __init__(self, background_colour):
+    def __init__(self, background_colour, rng=random):
         self.background_colour = background_colour
-        self.stars = []
         self.max_star_size = 4.25
         self.max_stars = SCREEN_WIDTH * SCREEN_HEIGHT // 750
         self.min_stars = SCREEN_WIDTH * SCREEN_HEIGHT // 900
-        self.add_stars(random.randint(self.min_stars, self.max_stars))
-
-    def add_stars(self, num):
-        for i in range(num):
-            self.stars.append(Star(random.random() * SCREEN_WIDTH, random.random() * SCREEN_HEIGHT,
-                                   random.random() * self.max_star_size))
+        self.stars = StarField(SCREEN_WIDTH, SCREEN_HEIGHT, self.background_colour,
+                               rng.randint(self.min_stars, self.max_stars), self.max_star_size, rng)
 
     def update(self, delta):
-        for star in self.stars:
-            star.update(delta)
+        self.stars.update(delta)
 
-    def draw(self, surface):
-        screen.fill(self.background_colour)
-        for star in self.stars:
-            star.draw(screen)
+    def draw(self, surface, rects=None):
+        self.stars.draw(surface, rects)
         # a = pygame.Color(255,0,0,100)
         # pygame.draw.circle(screen, a, (SCREEN_WIDTH/2, SCREEN_HEIGHT/2), 50)
 
 
-pygame.init()
-
-SCREEN_HEIGHT = 480
-SCREEN_WIDTH = 540
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Amongus Bird")
-icon = pygame.transform.scale(Player.bird, (32, 32))
-pygame.display.set_icon(icon)
-
-highest_score = 0
-
-game = Start("textures/logo", Game)
+SCREEN_HEIGHT = simulation.SCREEN_HEIGHT
+SCREEN_WIDTH = simulation.SCREEN_WIDTH
+DIRTY_RECTS = False
+# a window size other than the logical 540x480 draws at 540x480 and scales the finished frame up to the window
+WINDOW_SIZE = None
+INTEGER_SCALING = False
+PIPELINED = False
+PROFILE = False
+PROFILE_PATH = "profile.json"
+# set to a folder such as "replays" to keep a replay of every run, nothing prunes old ones
+REPLAY_DIRECTORY = None
+SCORES_PATH = "scores.sqlite3"
+SPLASH_PACK = "cache/logo.pack"
+
+# set by setup(), importing this module does not open a window or touch the textures
+screen = None
+renderer = None
+assets = None
+scores = None
 
 fps_cap = 120
-clock = pygame.time.Clock()
-delta = 1000 // fps_cap
-
-is_running = True
-while is_running:
-
-    for event in pygame.event.get(pygame.QUIT):
-        if event.type == pygame.QUIT:
-            is_running = False
-
-    game.update(delta)
-    game.draw(screen)
-
-    pygame.display.update()
-    delta = clock.tick(fps_cap)
 
-pygame.quit()
+game = None
+
+
+def setup():
+    global screen, renderer, assets, scores
+    pygame.init()
+    if WINDOW_SIZE is None:
+        renderer = Renderer(pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT)), DIRTY_RECTS)
+    else:
+        renderer = Renderer(pygame.display.set_mode(WINDOW_SIZE, pygame.RESIZABLE), DIRTY_RECTS,
+                            logical_size=(SCREEN_WIDTH, SCREEN_HEIGHT), integer_scaling=INTEGER_SCALING)
+    screen = renderer.screen
+    pygame.display.set_caption("Amongus Bird")
+    assets = Assets("textures").index(exclude=("logo",))
+    pygame.display.set_icon(assets.prepare(Player.frames[0], (32, 32)))
+    scores = ScoreStore(SCORES_PATH)
+    return screen
+
+
+def main():
+    global game, PIPELINED
+    started = time.perf_counter()
+    setup()
+    game = Start("textures/logo", Game, prepare_assets(assets))
+
+    clock = pygame.time.Clock()
+    delta = 1000 // fps_cap
+
+    profiler = Profiler()
+    overlay = ProfilerOverlay(profiler)
+    if PROFILE:
+        install_profiler(profiler)
+
+    is_running = True
+    while is_running:
+
+        for event in pygame.event.get((pygame.QUIT, pygame.KEYDOWN, pygame.VIDEORESIZE)):
+            if event.type == pygame.QUIT:
+                is_running = False
+            elif event.type == pygame.VIDEORESIZE:
+                renderer.resize()
+            elif event.key == pygame.K_F2:
+                renderer.toggle()
+            elif event.key == pygame.K_F3:
+                if not profiler.is_installed:
+                    install_profiler(profiler)
+                overlay.toggle()
+            elif event.key == pygame.K_F4:
+                PIPELINED = not PIPELINED
+                if isinstance(game, Game) and (game.worker is not None) != PIPELINED:
+                    game.toggle_pipeline()
+
+        if profiler.is_installed:
+            profiler.begin_frame()
+        game.update(delta)
+        renderer.present(game, delta, overlay if overlay.visible else None)
+        if profiler.is_installed:
+            profiler.end_frame()
+        if profiler.time_to_first_frame is None:
+            profiler.time_to_first_frame = (time.perf_counter() - started) * 1000
+
+        delta = clock.tick(fps_cap)
+
+    pygame.quit()
+    scores.close()
+    if profiler.is_installed and PROFILE_PATH is not None:
+        profiler.export(PROFILE_PATH)
+
+
+if __name__ == "__main__":
+    main()
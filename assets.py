@@ -0,0 +1,92 @@
+import os
+
+import pygame
+
+
+class Assets:
+    extensions = (".png",)
+    rotation_step = 2
+    rotation_limit = -70
+
+    def __init__(self, root="textures"):
+        self.root = root
+        self.paths = {}
+        self.surfaces = {}
+        self.rotations = {}
+        self.misses = 0
+
+    def index(self, exclude=()):
+        # only the file names are read here, each image is decoded the first time something asks for it
+        for directory, directories, files in os.walk(self.root):
+            if directory == self.root:
+                directories[:] = [name for name in directories if name not in exclude]
+            for file in sorted(files):
+                name, extension = os.path.splitext(file)
+                if extension.lower() not in self.extensions:
+                    continue
+                key = os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, "/")
+                self.paths[key] = os.path.join(directory, file)
+        return self
+
+    def source(self, key):
+        cache_key = (key, None, False, False)
+        if cache_key not in self.surfaces:
+            self.surfaces[cache_key] = self.convert(pygame.image.load(self.paths[key]))
+        return self.surfaces[cache_key]
+
+    def prepare(self, key, size=None, flip_x=False, flip_y=False):
+        cache_key = (key, size, flip_x, flip_y)
+        if cache_key not in self.surfaces:
+            surface = self.source(key)
+            if size is not None:
+                surface = pygame.transform.scale(surface, size)
+            if flip_x or flip_y:
+                surface = pygame.transform.flip(surface, flip_x, flip_y)
+            self.surfaces[cache_key] = self.convert(surface)
+        return self.surfaces[cache_key]
+
+    def get(self, key, size=None, flip_x=False, flip_y=False):
+        surface = self.surfaces.get((key, size, flip_x, flip_y))
+        if surface is None:
+            # everything used in game is prepared at startup, a miss here means a transform mid-game
+            self.misses += 1
+            surface = self.prepare(key, size, flip_x, flip_y)
+        return surface
+
+    def prepare_rotations(self, key, size=None, flip_x=False, flip_y=False):
+        cache_key = (key, size, flip_x, flip_y)
+        if cache_key not in self.rotations:
+            surface = self.prepare(key, size, flip_x, flip_y)
+            surfaces = []
+            rects = []
+            for i in range(-self.rotation_limit // self.rotation_step + 1):
+                rotated = self.convert(pygame.transform.rotate(surface, -i * self.rotation_step))
+                surfaces.append(rotated)
+                rects.append(rotated.get_rect())
+            self.rotations[cache_key] = (surfaces, rects)
+        return self.rotations[cache_key]
+
+    def rotation_index(self, angle):
+        angle = min(max(angle, self.rotation_limit), 0)
+        return round(-angle / self.rotation_step)
+
+    def get_rotations(self, key, size=None, flip_x=False, flip_y=False):
+        rotations = self.rotations.get((key, size, flip_x, flip_y))
+        if rotations is None:
+            self.misses += 1
+            rotations = self.prepare_rotations(key, size, flip_x, flip_y)
+        return rotations
+
+    def get_rotated(self, key, angle, size=None, flip_x=False, flip_y=False):
+        return self.get_rotations(key, size, flip_x, flip_y)[0][self.rotation_index(angle)]
+
+    def get_rotated_rect(self, key, angle, size=None, flip_x=False, flip_y=False):
+        return self.get_rotations(key, size, flip_x, flip_y)[1][self.rotation_index(angle)]
+
+    @staticmethod
+    def convert(surface):
+        if pygame.display.get_surface() is None:
+            return surface
+        if surface.get_flags() & pygame.SRCALPHA:
+            return surface.convert_alpha()
+        return surface.convert()
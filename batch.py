@@ -0,0 +1,176 @@
+import numpy as np
+
+from level import LevelStream
+from simulation import DEFAULT_CURVE, SCREEN_HEIGHT, Player, Simulation, Wall, WallManager
+
+
+class BatchSimulation:
+
+    def __init__(self, seeds, curve=DEFAULT_CURVE):
+        self.seeds = list(seeds)
+        self.curve = curve
+        self.wall_count = WallManager.wall_count(curve)
+        n = len(self.seeds)
+        self.streams = [None] * n
+
+        self.x = np.empty(n)
+        self.y = np.empty(n)
+        self.velocity_x = np.empty(n)
+        self.velocity_y = np.empty(n)
+        self.jump_cooldown = np.empty(n)
+        self.no_jump = np.empty(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.is_game_over = np.zeros(n, dtype=bool)
+        self.is_finished = np.zeros(n, dtype=bool)
+        self.slow_down_effect = np.empty(n)
+        self.frames = np.zeros(n, dtype=np.int64)
+        self.time = np.zeros(n)
+
+        self.wall_x = np.empty((n, self.wall_count))
+        self.hole_y = np.empty((n, self.wall_count), dtype=np.int64)
+        self.hole_height = np.empty((n, self.wall_count))
+        self.spacing = np.empty((n, self.wall_count))
+        self.span = np.empty(n)
+        self.score_award = np.empty((n, self.wall_count), dtype=np.int64)
+        # collision rects of every wall, refreshed in Wall.update and left stale on Wall.reset like the original
+        self.rect_x = np.empty((n, self.wall_count), dtype=np.int64)
+        self.top_height = np.empty((n, self.wall_count), dtype=np.int64)
+        self.bottom_y = np.empty((n, self.wall_count), dtype=np.int64)
+        self.bottom_height = np.empty((n, self.wall_count), dtype=np.int64)
+
+        self.reset(range(n), self.seeds)
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def reset(self, indices, seeds):
+        for i, seed in zip(indices, seeds):
+            self.seeds[i] = seed
+            self.streams[i] = LevelStream(seed, self.curve, Wall.hole_range)
+            span = 0
+            for j in range(self.wall_count):
+                segment = self.streams[i].next()
+                self.wall_x[i, j] = WallManager.starting_position + span
+                self.hole_y[i, j] = segment.hole_y
+                self.hole_height[i, j] = segment.hole_height
+                self.spacing[i, j] = segment.spacing
+                span += segment.spacing
+            self.span[i] = span
+            self.x[i] = Simulation.start_x
+            self.y[i] = Simulation.start_y
+        indices = np.asarray(list(indices), dtype=np.int64)
+        self.velocity_x[indices] = 0
+        self.velocity_y[indices] = 0
+        self.jump_cooldown[indices] = 200
+        self.no_jump[indices] = 0
+        self.score[indices] = 0
+        self.is_game_over[indices] = False
+        self.is_finished[indices] = False
+        self.slow_down_effect[indices] = 1.0
+        self.frames[indices] = 0
+        self.time[indices] = 0
+        self.score_award[indices] = 1
+        self.rect_x[indices] = np.trunc(self.wall_x[indices])
+        self.top_height[indices] = self.hole_y[indices]
+        self.bottom_y[indices] = np.trunc(self.hole_y[indices] + self.hole_height[indices])
+        self.bottom_height[indices] = np.trunc(
+            SCREEN_HEIGHT - (self.hole_y[indices] + self.hole_height[indices]) + Wall.end_pipe_height)
+
+    def step(self, delta, jump=False):
+        active = ~self.is_finished
+        delta = np.broadcast_to(np.asarray(delta, dtype=float), active.shape)
+        jump = np.broadcast_to(np.asarray(jump, dtype=bool), active.shape)
+        self.update_walls(active, delta)
+        alive = self.update_players(active, delta, jump)
+
+        died = active & ~alive & ~self.is_game_over
+        self.velocity_x[died] = -Player.speed
+        self.is_game_over |= died
+        over = active & self.is_game_over
+        self.slow_down_effect[over] /= delta[over]
+        self.is_finished |= over & self.is_out_of_bounds()
+
+        self.frames[active] += 1
+        self.time[active] += delta[active]
+        return ~self.is_finished
+
+    def update_walls(self, active, delta):
+        rows = active[:, None]
+        wall_speed = Player.speed * self.slow_down_effect * self.no_jump
+        np.subtract(self.wall_x, (wall_speed * delta)[:, None], out=self.wall_x, where=rows)
+        # rects are rewritten in place, float to int casts truncate like pygame.Rect
+        np.copyto(self.rect_x, self.wall_x, casting="unsafe", where=rows)
+        np.copyto(self.top_height, self.hole_y, where=rows)
+        np.copyto(self.bottom_y, self.hole_y + self.hole_height, casting="unsafe", where=rows)
+        np.copyto(self.bottom_height, SCREEN_HEIGHT - (self.hole_y + self.hole_height) + Player.height,
+                  casting="unsafe", where=rows)
+
+        # Wall.reset reads each game's own level stream in wall order, so the rare respawns stay a Python loop
+        passed = active[:, None] & (self.wall_x + Wall.width < 0)
+        for i, j in zip(*np.nonzero(passed)):
+            segment = self.streams[i].next()
+            self.wall_x[i, j] += self.span[i]
+            self.span[i] += segment.spacing - self.spacing[i, j]
+            self.hole_y[i, j] = segment.hole_y
+            self.hole_height[i, j] = segment.hole_height
+            self.spacing[i, j] = segment.spacing
+            self.score_award[i, j] = 1
+
+        awarded = active[:, None] & (self.x[:, None] > self.wall_x + Wall.width)
+        self.score += np.where(awarded, self.score_award, 0).sum(axis=1)
+        self.score_award[awarded] = 0
+
+    def update_players(self, active, delta, jump):
+        self.velocity_x[active] *= self.no_jump[active]
+        self.velocity_y[active] *= self.no_jump[active]
+        self.jump_cooldown[active] -= delta[active]
+
+        jumping = active & jump & ~self.is_game_over & (self.jump_cooldown <= 0)
+        self.no_jump[jumping] = 1
+        self.velocity_y[jumping] = -Player.jump_strength
+        self.jump_cooldown[jumping] = Player.jump_cooldown_length
+
+        moving = active & ~self.is_out_of_bounds()
+        self.x[moving] += self.velocity_x[moving] * delta[moving]
+        hit_wall, _ = self.first_collision(moving)
+        hit_x = moving & (hit_wall >= 0)
+        rows = np.nonzero(hit_x)[0]
+        wall_x = self.wall_x[rows, hit_wall[rows]]
+        self.x[rows] = np.where(self.x[rows] < wall_x + Wall.width, wall_x - Player.width,
+                                wall_x + Wall.width + Player.width)
+        self.velocity_x[rows] *= -1
+
+        moving &= ~hit_x
+        self.y[moving] += self.velocity_y[moving] * delta[moving]
+        hit_wall, hit_bottom = self.first_collision(moving)
+        hit_y = moving & (hit_wall >= 0)
+        rows = np.nonzero(hit_y)[0]
+        cols = hit_wall[rows]
+        bottom = hit_bottom[rows]
+        rect_y = np.where(bottom, self.bottom_y[rows, cols], Wall.y)
+        rect_height = np.where(bottom, self.bottom_height[rows, cols], self.top_height[rows, cols])
+        self.y[rows] = np.where(self.y[rows] < rect_y + rect_height, rect_y - Player.height,
+                                rect_y + rect_height + Player.height)
+        self.velocity_y[rows] *= -1
+
+        moving &= ~hit_y
+        self.velocity_y[moving] += Player.gravity
+        return moving
+
+    def first_collision(self, mask):
+        # index of the first wall whose top or bottom rect overlaps the player, -1 when none does,
+        # scanning in the same wall-then-rect order as Player.update
+        left = np.trunc(self.x - Player.width / 2).astype(np.int64)[:, None]
+        top = np.trunc(self.y - Player.height / 2 + Player.crop).astype(np.int64)[:, None]
+        width = Player.width
+        height = int(Player.height - 2 * Player.crop)
+        overlap_x = (left < self.rect_x + Wall.width) & (left + width > self.rect_x)
+        hits_top = overlap_x & (top < Wall.y + self.top_height) & (top + height > Wall.y)
+        hits_bottom = overlap_x & (top < self.bottom_y + self.bottom_height) & (top + height > self.bottom_y)
+        hits = (hits_top | hits_bottom) & mask[:, None]
+        first = np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+        bottom = ~hits_top[np.arange(len(first)), np.maximum(first, 0)]
+        return first, bottom
+
+    def is_out_of_bounds(self):
+        return (self.y + Player.height < 0) | (self.y - Player.height > SCREEN_HEIGHT)
@@ -0,0 +1,43 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+import pygame
+
+import simulation
+import starfield
+
+
+def measure(build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def main(count=10000):
+    pygame.init()
+    wall = simulation.Wall
+    spacing = simulation.WallManager.wall_separation_distance
+    results = {
+        "Player": measure(lambda: [simulation.Player(0, 0) for _ in range(count)], count),
+        "Wall": measure(lambda: [wall(0, wall.min_hole_y, wall.default_hole_height, spacing) for _ in range(count)], count),
+        "Simulation": measure(lambda: [simulation.Simulation(i) for i in range(count)], count),
+        "StarField (per star)": measure(lambda: starfield.StarField(3840, 2160, (15, 15, 15), count, 4.25), count),
+    }
+    field = starfield.StarField(3840, 2160, (15, 15, 15), count, 4.25)
+    results["Star view"] = measure(lambda: list(field), count)
+    for name, size in results.items():
+        print(f"{name}: {size:.0f} bytes")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+import pygame
+
+import env
+import runner
+import simulation
+from splash import SplashFrames
+from text import text_cache
+
+SCENARIOS = {}
+# the splash pack a scenario starts from is decided here, never left over from an earlier run in the checkout
+PACK_DIRECTORY = None
+
+# run in a fresh interpreter so imports, the display and the caches all start cold
+FIRST_FRAME_SCRIPT = """
+import time
+started = time.perf_counter()
+import importlib.util, os, sys
+os.chdir(sys.argv[1])
+sys.path.insert(0, sys.argv[1])
+spec = importlib.util.spec_from_file_location("amongus_bird", "Amongus Bird.py")
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+module.SPLASH_PACK = sys.argv[2] or None
+module.SCORES_PATH = None
+module.REPLAY_DIRECTORY = None
+module.setup()
+module.game = module.Start("textures/logo", module.Game, module.prepare_assets(module.assets))
+module.game.update(module.Game.tick_length)
+module.renderer.present(module.game)
+print(time.perf_counter() - started)
+"""
+
+
+def scenario(unit):
+    def register(function):
+        SCENARIOS[function.__name__] = (function, unit)
+        return function
+    return register
+
+
+def load_game():
+    os.chdir(ROOT)
+    spec = importlib.util.spec_from_file_location("amongus_bird", os.path.join(ROOT, "Amongus Bird.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.REPLAY_DIRECTORY = None
+    module.SCORES_PATH = None
+    module.SPLASH_PACK = None
+    module.setup()
+    for _ in module.prepare_assets(module.assets):
+        pass
+    return module
+
+
+class ScriptedKeys:
+
+    def __init__(self, module):
+        self.module = module
+
+    def __getitem__(self, key):
+        return (key == pygame.K_SPACE and isinstance(self.module.game, self.module.Game)
+                and runner.follow_hole(self.module.game.simulation))
+
+
+def play(module, frames, seed=0):
+    module.game = module.Game(seed)
+    for _ in range(frames):
+        module.game.update(module.Game.tick_length)
+        if not isinstance(module.game, module.Game):
+            seed += 1
+            module.game = module.Game(seed)
+
+
+@scenario("frames/s")
+def simulation_step(module):
+    frames = 0
+    seed = 0
+    start = time.perf_counter()
+    while frames < 200000:
+        game = simulation.Simulation(seed)
+        while game.frames < 20000 and game.step(game.tick_length, runner.follow_hole(game)):
+            pass
+        frames += game.frames
+        seed += 1
+    return frames / (time.perf_counter() - start)
+
+
+def env_steps(environment, steps=3000):
+    rng = random.Random(0)
+    environment.reset(0)
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, terminated, truncated, _ = environment.step(rng.random() < 0.1)
+        if terminated or truncated:
+            episodes += 1
+            environment.reset(episodes)
+    return steps / (time.perf_counter() - start)
+
+
+@scenario("steps/s")
+def env_step(module):
+    return env_steps(env.Env())
+
+
+@scenario("steps/s")
+def env_step_pixels_84(module):
+    # the views are the ones already loaded here rather than a second copy of the game script
+    env.game_module = module
+    return env_steps(env.Env(pixels=True, pixel_size=(84, 84)), 500)
+
+
+@scenario("steps/s")
+def batch_env_step(module):
+    count = 256
+    environment = env.BatchEnv(count)
+    environment.reset()
+    rng = random.Random(0)
+    steps = 200
+    start = time.perf_counter()
+    for _ in range(steps):
+        environment.step([rng.random() < 0.1 for _ in range(count)])
+    return steps * count / (time.perf_counter() - start)
+
+
+@scenario("frames/s")
+def game_update(module):
+    frames = 20000
+    start = time.perf_counter()
+    play(module, frames)
+    return frames / (time.perf_counter() - start)
+
+
+@scenario("draws/s")
+def game_draw(module):
+    module.game = module.Game(0)
+    play(module, 500)
+    draws = 2000
+    start = time.perf_counter()
+    for _ in range(draws):
+        module.game.draw(module.screen)
+    return draws / (time.perf_counter() - start)
+
+
+def frames(module, pipelined):
+    module.PIPELINED = pipelined
+    try:
+        module.game = module.Game(0)
+        count = 0
+        seed = 0
+        start = time.perf_counter()
+        while count < 3000:
+            module.game.update(module.Game.tick_length)
+            if not isinstance(module.game, module.Game):
+                seed += 1
+                module.game = module.Game(seed)
+            module.game.draw(module.screen)
+            count += 1
+        if module.game.worker is not None:
+            module.game.toggle_pipeline()
+        return count / (time.perf_counter() - start)
+    finally:
+        module.PIPELINED = False
+
+
+@scenario("frames/s")
+def game_frame(module):
+    return frames(module, False)
+
+
+@scenario("frames/s")
+def game_frame_pipelined(module):
+    return frames(module, True)
+
+
+def present(module, window_size=None, dirty_rects=False, integer_scaling=False):
+    screen = module.screen
+    if window_size is None:
+        renderer = module.Renderer(screen, dirty_rects)
+    else:
+        renderer = module.Renderer(pygame.display.set_mode(window_size), dirty_rects,
+                                   logical_size=(module.SCREEN_WIDTH, module.SCREEN_HEIGHT),
+                                   integer_scaling=integer_scaling)
+        module.screen = renderer.screen
+    try:
+        module.game = module.Game(0)
+        count = 0
+        seed = 0
+        start = time.perf_counter()
+        while count < 2000:
+            module.game.update(module.Game.tick_length)
+            if not isinstance(module.game, module.Game):
+                seed += 1
+                module.game = module.Game(seed)
+            renderer.present(module.game, module.Game.tick_length)
+            count += 1
+        return count / (time.perf_counter() - start)
+    finally:
+        if window_size is not None:
+            module.screen = pygame.display.set_mode((module.SCREEN_WIDTH, module.SCREEN_HEIGHT))
+
+
+@scenario("frames/s")
+def present_native(module):
+    return present(module)
+
+
+@scenario("frames/s")
+def present_1080p(module):
+    return present(module, (1920, 1080))
+
+
+@scenario("frames/s")
+def present_1080p_dirty_int(module):
+    return present(module, (1920, 1080), dirty_rects=True, integer_scaling=True)
+
+
+@scenario("frames/s")
+def present_2160p(module):
+    return present(module, (3840, 2160))
+
+
+def background(module, width, height):
+    random.seed(0)
+    screen_width, screen_height = module.SCREEN_WIDTH, module.SCREEN_HEIGHT
+    module.SCREEN_WIDTH, module.SCREEN_HEIGHT = width, height
+    try:
+        scene = module.Background((15, 15, 15))
+    finally:
+        module.SCREEN_WIDTH, module.SCREEN_HEIGHT = screen_width, screen_height
+    surface = pygame.Surface((width, height)).convert()
+    scene.draw(surface)
+    frames = 1000
+    start = time.perf_counter()
+    for _ in range(frames):
+        scene.update(module.Game.tick_length)
+        scene.draw(surface)
+    return frames / (time.perf_counter() - start)
+
+
+@scenario("frames/s")
+def background_540x480(module):
+    return background(module, 540, 480)
+
+
+@scenario("frames/s")
+def background_1920x1080(module):
+    return background(module, 1920, 1080)
+
+
+@scenario("frames/s")
+def background_3840x2160(module):
+    return background(module, 3840, 2160)
+
+
+@scenario("calls/s")
+def label_create_text(module):
+    label = module.Label(0, 0, ["Score: 0"], 20)
+    calls = 20000
+    start = time.perf_counter()
+    for i in range(calls):
+        label.create_text([f"Score: {module.format_number(i % 500)}"])
+    return calls / (time.perf_counter() - start)
+
+
+@scenario("calls/s")
+def label_create_text_uncached(module):
+    label = module.Label(0, 0, ["Score: 0"], 20)
+    calls = 5000
+    start = time.perf_counter()
+    for i in range(calls):
+        text_cache.surfaces.clear()
+        label.create_text([f"Score: {module.format_number(i)}"])
+    return calls / (time.perf_counter() - start)
+
+
+def warm_pack(module):
+    path = os.path.join(PACK_DIRECTORY, "logo.pack")
+    if not os.path.exists(path):
+        frames = SplashFrames("textures/logo", module.Start.scale, path)
+        for index in range(len(frames)):
+            frames.get(index)
+        # the decoder writes the pack once it has seen every frame and then stops
+        frames.thread.join()
+    return path
+
+
+def splash(module, pack_path):
+    module.SPLASH_PACK = pack_path
+    try:
+        frames = 0
+        start = time.perf_counter()
+        while frames < 3000:
+            screen = module.Start("textures/logo", module.Game)
+            module.game = screen
+            while module.game is screen and frames < 3000:
+                screen.update(module.Game.tick_length)
+                if module.game is screen:
+                    screen.draw(module.screen)
+                frames += 1
+        return frames / (time.perf_counter() - start)
+    finally:
+        module.SPLASH_PACK = None
+
+
+@scenario("frames/s")
+def start_splash(module):
+    return splash(module, None)
+
+
+@scenario("frames/s")
+def start_splash_packed(module):
+    return splash(module, warm_pack(module))
+
+
+def first_frame(pack_path):
+    output = subprocess.run([sys.executable, "-c", FIRST_FRAME_SCRIPT, ROOT, pack_path or ""], check=True,
+                            capture_output=True, text=True).stdout
+    return 1 / float(output.split()[-1])
+
+
+@scenario("starts/s")
+def time_to_first_frame(module):
+    return first_frame(None)
+
+
+@scenario("starts/s")
+def time_to_first_frame_packed(module):
+    return first_frame(warm_pack(module))
+
+
+def run(names, repeat):
+    global PACK_DIRECTORY
+    module = load_game()
+    get_pressed = pygame.key.get_pressed
+    wait = pygame.time.wait
+    pygame.key.get_pressed = lambda: ScriptedKeys(module)
+    pygame.time.wait = lambda milliseconds: None
+    pack_directory = tempfile.TemporaryDirectory(prefix="amongus-bird-")
+    PACK_DIRECTORY = pack_directory.name
+    results = {}
+    try:
+        for name in names:
+            function, unit = SCENARIOS[name]
+            samples = []
+            for _ in range(repeat):
+                random.seed(0)
+                samples.append(function(module))
+            results[name] = {"value": statistics.median(samples), "unit": unit, "samples": samples}
+            print(f"{name:<28}{results[name]['value']:>14,.1f} {unit}")
+    finally:
+        pygame.key.get_pressed = get_pressed
+        pygame.time.wait = wait
+        pack_directory.cleanup()
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ["SDL_VIDEODRIVER"],
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    # every metric is a rate, so a drop beyond the threshold is a regression
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["value"]
+        change = (result["value"] - before) / before
+        flag = "REGRESSION" if change < -threshold else ""
+        print(f"{name:<28}{before:>14,.1f} -> {result['value']:>14,.1f} {result['unit']:<9}{change:>+8.1%} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed-seed throughput benchmarks for Amongus Bird")
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging, 0.10 = 10%%")
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+
+    current = run(names, args.repeat)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print()
+        if compare(baseline, current, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+import bisect
+
+
+class Rect:
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x, y, width, height):
+        self.x = int(x)
+        self.y = int(y)
+        self.width = int(width)
+        self.height = int(height)
+
+    def update(self, x, y, width, height):
+        self.x = int(x)
+        self.y = int(y)
+        self.width = int(width)
+        self.height = int(height)
+
+    def colliderect(self, other):
+        # same rules as pygame.Rect.colliderect, so the headless game plays exactly like the windowed one
+        if self.width == 0 or self.height == 0 or other.width == 0 or other.height == 0:
+            return False
+        return (min(self.x, self.x + self.width) < max(other.x, other.x + other.width)
+                and min(self.y, self.y + self.height) < max(other.y, other.y + other.height)
+                and max(self.x, self.x + self.width) > min(other.x, other.x + other.width)
+                and max(self.y, self.y + self.height) > min(other.y, other.y + other.height))
+
+
+def left_edge(wall):
+    return wall.collision_rects[0].x
+
+
+class SweepIndex:
+
+    def __init__(self, walls, wall_width):
+        self.walls = walls
+        self.wall_width = wall_width
+        for i, wall in enumerate(self.walls):
+            wall.index = i
+        self.order = sorted(self.walls, key=left_edge)
+
+    def resort(self):
+        # walls only leave x order when one respawns, which timsort fixes in a single pass
+        self.order.sort(key=left_edge)
+
+    def query(self, rect):
+        start = bisect.bisect_right(self.order, rect.x - self.wall_width, key=left_edge)
+        order = self.order
+        found = []
+        # walked by index, slicing would copy the whole tail and make every query linear in the wall count
+        for i in range(start, len(order)):
+            wall = order[i]
+            if left_edge(wall) >= rect.x + rect.width:
+                break
+            found.append(wall)
+        if len(found) > 1:
+            found.sort(key=lambda wall: wall.index)
+        return found
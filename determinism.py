@@ -0,0 +1,108 @@
+import argparse
+
+import numpy as np
+
+import runner
+from batch import BatchSimulation
+from level import Ramp
+from replay import Recorder, Replay
+from simulation import DEFAULT_CURVE, Player, Simulation, Wall
+
+CURVES = (DEFAULT_CURVE, Ramp(60, 45, 270, 120, 20))
+
+# seed, score, frames, x, y of the bot on the default curve, cut off at 12000 frames, as the original physics left them
+TRACES = (
+    (0, 35, 5552, 99.66666666672367, 529.0666666666762),
+    (1, 11, 1924, 119.83333333334234, 528.6833333333345),
+    (2, 79, 12000, 270.0, 295.6333333333575),
+    (3, 2, 582, 94.25000000000439, 525.6000000000005),
+    (4, 79, 12000, 270.0, 136.1833333333447),
+    (5, 3, 724, 109.83333333332628, 528.7333333333343),
+    (6, 16, 2685, 106.37500000003182, 526.4000000000042),
+    (7, 6, 1179, 104.62500000001234, 524.3500000000013),
+)
+
+
+def play(seed, curve, max_frames, recorder=None):
+    simulation = Simulation(seed, curve)
+    while simulation.frames < max_frames:
+        jump = runner.follow_hole(simulation)
+        if recorder is not None:
+            recorder.record(simulation.tick_length, jump)
+        if not simulation.step(simulation.tick_length, jump):
+            break
+    if recorder is not None:
+        recorder.finish(simulation.score)
+    return simulation
+
+
+def follow_hole(batch):
+    # runner.follow_hole for every game at once
+    ahead = batch.wall_x + Wall.width > (batch.x - Player.width / 2)[:, None]
+    nearest = np.where(ahead, batch.wall_x, np.inf).argmin(axis=1)
+    rows = np.arange(len(batch))
+    target = np.where(ahead.any(axis=1), batch.hole_y[rows, nearest] + (batch.hole_height[rows, nearest] + Wall.y) / 2,
+                      Simulation.start_y)
+    return (batch.no_jump == 0) | ((batch.y > target + Player.crop) & (batch.velocity_y > 0))
+
+
+def check_traces():
+    failures = []
+    for seed, *expected in TRACES:
+        simulation = play(seed, DEFAULT_CURVE, 12000)
+        found = [simulation.score, simulation.frames, simulation.player.x, simulation.player.y]
+        if found != expected:
+            failures.append(f"trace seed {seed}: {found} != {expected}")
+    return failures
+
+
+def check_batch(seeds, curve, max_frames):
+    batch = BatchSimulation(seeds, curve)
+    for _ in range(max_frames):
+        if batch.is_finished.all():
+            break
+        batch.step(Simulation.tick_length, follow_hole(batch))
+    failures = []
+    for i, seed in enumerate(seeds):
+        simulation = play(seed, curve, max_frames)
+        walls = simulation.wall_manager.walls
+        single = (simulation.score, simulation.frames, simulation.player.x, simulation.player.y, simulation.time,
+                  [wall.x for wall in walls], [wall.hole_y for wall in walls])
+        batched = (int(batch.score[i]), int(batch.frames[i]), batch.x[i], batch.y[i], batch.time[i],
+                   batch.wall_x[i].tolist(), batch.hole_y[i].tolist())
+        if single != batched:
+            failures.append(f"batch seed {seed} on {curve.key()}: {single[:5]} != {batched[:5]}")
+    return failures
+
+
+def check_replays(seeds, curve, max_frames):
+    failures = []
+    for seed in seeds:
+        recorder = Recorder(seed, curve)
+        simulation = play(seed, curve, max_frames, recorder)
+        replay = Replay.from_bytes(recorder.to_bytes())
+        replayed, matches = replay.verify()
+        if not matches or replay.curve.key() != curve.key() or replayed.player.y != simulation.player.y:
+            failures.append(f"replay seed {seed} on {curve.key()}: score {replayed.score} != {simulation.score}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that Amongus Bird physics still play out exactly as before")
+    parser.add_argument("--seeds", type=int, default=40)
+    parser.add_argument("--max-frames", type=int, default=12000)
+    args = parser.parse_args()
+
+    seeds = list(range(args.seeds))
+    failures = check_traces()
+    for curve in CURVES:
+        failures += check_batch(seeds, curve, args.max_frames)
+        failures += check_replays(seeds[:10], curve, args.max_frames)
+    for failure in failures:
+        print(failure)
+    print(f"{len(failures)} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
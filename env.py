@@ -0,0 +1,209 @@
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+import pygame
+
+from assets import Assets
+from batch import BatchSimulation
+from scores import ScoreStore
+from simulation import DEFAULT_CURVE, Player, Simulation, Wall
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+OBSERVATION_SIZE = 4
+
+game_module = None
+
+
+def load_game():
+    # the views live in the game script, whose name has a space in it, so it is loaded by path once and shared
+    global game_module
+    if game_module is None:
+        spec = importlib.util.spec_from_file_location("amongus_bird", os.path.join(ROOT, "Amongus Bird.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.REPLAY_DIRECTORY = None
+        module.SCORES_PATH = None
+        module.scores = ScoreStore(None)
+        # no window is opened, the textures and fonts are only ever drawn to off-screen surfaces
+        pygame.font.init()
+        module.assets = Assets(os.path.join(ROOT, "textures")).index(exclude=("logo",))
+        for _ in module.prepare_assets(module.assets):
+            pass
+        game_module = module
+    return game_module
+
+
+def observe(simulation, out):
+    player = simulation.player
+    wall = simulation.next_wall()
+    out[0] = player.y
+    out[1] = player.velocity_y
+    out[2] = wall.x - player.x if wall is not None else Wall.width
+    out[3] = wall.hole_y if wall is not None else Wall.min_hole_y
+    return out
+
+
+class Env:
+    # one step holds the action for frame_skip ticks, the reward is the walls passed during them
+
+    def __init__(self, frame_skip=4, delta=Simulation.tick_length, max_steps=10000, pixels=False, pixel_size=None,
+                 curve=DEFAULT_CURVE):
+        self.frame_skip = frame_skip
+        self.delta = delta
+        self.max_steps = max_steps
+        self.pixels = pixels
+        self.pixel_size = pixel_size
+        self.curve = curve
+        self.simulation = None
+        self.game = None
+        self.steps = 0
+        self.state = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+        if pixels:
+            load_game()
+            self.surface = pygame.Surface((game_module.SCREEN_WIDTH, game_module.SCREEN_HEIGHT))
+            self.scaled = pygame.Surface(pixel_size) if pixel_size is not None else None
+
+    def reset(self, seed=None):
+        if self.pixels:
+            # stepping goes through Game.update so the views animate exactly like the windowed game
+            self.game = game_module.Game(seed, self.curve)
+            self.simulation = self.game.simulation
+        else:
+            self.simulation = Simulation(seed, self.curve)
+        self.steps = 0
+        return self.observation(), {"seed": self.simulation.seed}
+
+    def step(self, action):
+        simulation = self.simulation
+        jump = bool(action)
+        score = simulation.score
+        for _ in range(self.frame_skip):
+            if simulation.is_game_over:
+                break
+            if self.game is not None:
+                self.game.update(self.delta, {pygame.K_SPACE: jump})
+            else:
+                simulation.step(self.delta, jump)
+        self.steps += 1
+        truncated = self.steps >= self.max_steps and not simulation.is_game_over
+        return (self.observation(), simulation.score - score, simulation.is_game_over, truncated,
+                {"score": simulation.score, "frames": simulation.frames})
+
+    def observation(self):
+        observe(self.simulation, self.state)
+        if not self.pixels:
+            return self.state.copy()
+        # the windowed game blends towards the latest tick, an agent should see the tick itself
+        self.game.player.interpolate(1)
+        self.game.wall_manager.interpolate(1)
+        self.game.draw(self.surface)
+        surface = self.surface
+        if self.scaled is not None:
+            pygame.transform.smoothscale(surface, self.pixel_size, self.scaled)
+            surface = self.scaled
+        return pygame.surfarray.array3d(surface).swapaxes(0, 1)
+
+
+class BatchEnv:
+    # finished environments start over on the next seed inside step, the observation they end on goes in info
+
+    def __init__(self, count, first_seed=0, frame_skip=4, delta=Simulation.tick_length, max_steps=10000,
+                 curve=DEFAULT_CURVE):
+        self.count = count
+        self.next_seed = first_seed
+        self.frame_skip = frame_skip
+        self.delta = delta
+        self.max_steps = max_steps
+        self.curve = curve
+        self.batch = None
+        self.steps = np.zeros(count, dtype=np.int64)
+
+    def take_seeds(self, count):
+        seeds = range(self.next_seed, self.next_seed + count)
+        self.next_seed += count
+        return seeds
+
+    def reset(self):
+        self.batch = BatchSimulation(self.take_seeds(self.count), self.curve)
+        self.steps[:] = 0
+        return self.observation(), {"seeds": list(self.batch.seeds)}
+
+    def step(self, actions):
+        batch = self.batch
+        jump = np.asarray(actions, dtype=bool)
+        score = batch.score.copy()
+        for _ in range(self.frame_skip):
+            # a game that is over would only fall from here, so it stops where it died like Env does
+            batch.is_finished |= batch.is_game_over
+            if batch.is_finished.all():
+                break
+            batch.step(self.delta, jump)
+        self.steps += 1
+        rewards = batch.score - score
+        terminated = batch.is_game_over.copy()
+        truncated = (self.steps >= self.max_steps) & ~terminated
+        observations = self.observation()
+        info = {"score": batch.score.copy(), "final_observation": observations.copy()}
+        done = np.nonzero(terminated | truncated)[0]
+        if len(done):
+            batch.reset(done, self.take_seeds(len(done)))
+            self.steps[done] = 0
+            observations[done] = self.observation()[done]
+        return observations, rewards, terminated, truncated, info
+
+    def observation(self):
+        batch = self.batch
+        # same choice as Simulation.next_wall: the nearest wall whose right edge is still ahead of the bird's back
+        ahead = batch.wall_x + Wall.width > (batch.x - Player.width / 2)[:, None]
+        nearest = np.where(ahead, batch.wall_x, np.inf).argmin(axis=1)
+        rows = np.arange(len(batch))
+        any_ahead = ahead.any(axis=1)
+        out = np.empty((len(batch), OBSERVATION_SIZE), dtype=np.float32)
+        out[:, 0] = batch.y
+        out[:, 1] = batch.velocity_y
+        out[:, 2] = np.where(any_ahead, batch.wall_x[rows, nearest] - batch.x, Wall.width)
+        out[:, 3] = np.where(any_ahead, batch.hole_y[rows, nearest], Wall.min_hole_y)
+        return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Amongus Bird environment throughput with random actions")
+    parser.add_argument("--envs", type=int, default=1, help="more than one steps them together as a batch")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--frame-skip", type=int, default=4)
+    parser.add_argument("--pixels", action="store_true")
+    parser.add_argument("--pixel-size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    episodes = 0
+    start = time.perf_counter()
+    if args.envs > 1:
+        if args.pixels:
+            parser.error("pixel observations are only available with --envs 1")
+        env = BatchEnv(args.envs, args.seed, args.frame_skip)
+        env.reset()
+        for _ in range(args.steps):
+            _, _, terminated, truncated, _ = env.step(rng.random(args.envs) < 0.1)
+            episodes += int((terminated | truncated).sum())
+    else:
+        env = Env(args.frame_skip, pixels=args.pixels, pixel_size=tuple(args.pixel_size) if args.pixel_size else None)
+        env.reset(args.seed)
+        for _ in range(args.steps):
+            _, _, terminated, truncated, _ = env.step(rng.random() < 0.1)
+            if terminated or truncated:
+                episodes += 1
+                env.reset(args.seed + episodes)
+    elapsed = time.perf_counter() - start
+    steps = args.steps * args.envs
+    print(f"{steps} steps over {args.envs} env(s), {episodes} episodes finished, {elapsed:.2f}s")
+    print(f"{steps / elapsed:,.0f} steps/s, {steps * args.frame_skip / elapsed:,.0f} ticks/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+import collections
+import random
+
+Segment = collections.namedtuple("Segment", ("hole_y", "hole_height", "spacing"))
+Course = collections.namedtuple("Course", ("segments", "state"))
+
+
+class Constant:
+    __slots__ = ("hole_height", "spacing")
+
+    def __init__(self, hole_height, spacing):
+        self.hole_height = hole_height
+        self.spacing = spacing
+
+    def key(self):
+        return "constant", self.hole_height, self.spacing
+
+    def at(self, number):
+        return self.hole_height, self.spacing
+
+    def min_spacing(self):
+        return self.spacing
+
+
+class Ramp:
+    # walls are numbered from 0 and each one passed scores a point, so a wall's number is the score it is met at
+    __slots__ = ("start_hole_height", "end_hole_height", "start_spacing", "end_spacing", "walls")
+
+    def __init__(self, start_hole_height, end_hole_height, start_spacing, end_spacing, walls):
+        self.start_hole_height = start_hole_height
+        self.end_hole_height = end_hole_height
+        self.start_spacing = start_spacing
+        self.end_spacing = end_spacing
+        self.walls = walls
+
+    def key(self):
+        return "ramp", self.start_hole_height, self.end_hole_height, self.start_spacing, self.end_spacing, self.walls
+
+    def at(self, number):
+        progress = min(number / self.walls, 1)
+        return (self.start_hole_height + (self.end_hole_height - self.start_hole_height) * progress,
+                self.start_spacing + (self.end_spacing - self.start_spacing) * progress)
+
+    def min_spacing(self):
+        return min(self.start_spacing, self.end_spacing)
+
+
+CURVES = {"constant": Constant, "ramp": Ramp}
+
+
+def curve_from_key(key):
+    # the inverse of key(), for curves that were saved along with a run
+    return CURVES[key[0]](*key[1:])
+
+
+class LevelStream:
+    chunk_size = 16
+
+    def __init__(self, seed, curve, hole_range, course=None):
+        self.seed = seed
+        self.curve = curve
+        # maps a hole height to the range its top edge can be drawn from
+        self.hole_range = hole_range
+        self.rng = random.Random(seed)
+        self.course = course
+        # segments are generated a chunk at a time into a fixed ring, reads only ever go forwards
+        self.ring = [None] * self.chunk_size
+        self.read = 0
+        self.written = 0
+        if course is not None:
+            self.rng.setstate(course.state)
+            self.written = len(course.segments)
+
+    def generate(self, number):
+        hole_height, spacing = self.curve.at(number)
+        low, high = self.hole_range(hole_height)
+        return Segment(self.rng.randint(low, high), hole_height, spacing)
+
+    def fill(self):
+        for _ in range(self.chunk_size):
+            self.ring[self.written % self.chunk_size] = self.generate(self.written)
+            self.written += 1
+
+    def next(self):
+        number = self.read
+        self.read += 1
+        if self.course is not None and number < len(self.course.segments):
+            return self.course.segments[number]
+        if number >= self.written:
+            self.fill()
+        return self.ring[number % self.chunk_size]
+
+
+class CourseCache:
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.courses = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, seed, curve, hole_range, length):
+        key = (seed, curve.key(), length)
+        course = self.courses.get(key)
+        if course is not None:
+            self.courses.move_to_end(key)
+            self.hits += 1
+            return course
+        self.misses += 1
+        stream = LevelStream(seed, curve, hole_range)
+        segments = tuple(stream.generate(number) for number in range(length))
+        course = Course(segments, stream.rng.getstate())
+        self.courses[key] = course
+        if len(self.courses) > self.max_size:
+            self.courses.popitem(last=False)
+        return course
+
+
+course_cache = CourseCache()
@@ -0,0 +1,118 @@
+import threading
+
+from collision import Rect
+
+
+class PlayerState:
+    __slots__ = ("x", "y", "previous_x", "previous_y", "velocity_x", "velocity_y", "no_jump")
+
+
+class WallState:
+    __slots__ = ("x", "previous_x", "resets", "previous_resets", "collision_rects")
+
+    def __init__(self):
+        self.collision_rects = (Rect(0, 0, 0, 0), Rect(0, 0, 0, 0))
+
+
+class Snapshot:
+    __slots__ = ("simulation", "player", "walls", "score", "is_finished", "alpha")
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.player = PlayerState()
+        self.walls = [WallState() for _ in simulation.wall_manager.walls]
+        self.score = 0
+        self.is_finished = False
+        self.alpha = 0
+        self.remember()
+        self.capture(0)
+
+    def remember(self):
+        self.player.previous_x = self.simulation.player.x
+        self.player.previous_y = self.simulation.player.y
+        for state, wall in zip(self.walls, self.simulation.wall_manager.walls):
+            state.previous_x = wall.x
+            state.previous_resets = wall.resets
+
+    def carry_previous(self, other):
+        # a frame too short for a whole tick still has to blend from where the last one started
+        self.player.previous_x = other.player.previous_x
+        self.player.previous_y = other.player.previous_y
+        for state, previous in zip(self.walls, other.walls):
+            state.previous_x = previous.previous_x
+            state.previous_resets = previous.previous_resets
+
+    def capture(self, alpha):
+        body = self.simulation.player
+        player = self.player
+        player.x = body.x
+        player.y = body.y
+        player.velocity_x = body.velocity_x
+        player.velocity_y = body.velocity_y
+        player.no_jump = body.no_jump
+        for state, wall in zip(self.walls, self.simulation.wall_manager.walls):
+            state.x = wall.x
+            state.resets = wall.resets
+            for rect, source in zip(state.collision_rects, wall.collision_rects):
+                rect.update(source.x, source.y, source.width, source.height)
+        self.score = self.simulation.score
+        self.is_finished = self.simulation.is_finished
+        self.alpha = alpha
+
+
+class SimulationWorker:
+
+    def __init__(self, simulation, advance):
+        # advance(delta, pressed, remember) runs whole ticks and returns the blend factor for the frame
+        self.advance = advance
+        self.snapshots = (Snapshot(simulation), Snapshot(simulation))
+        self.front = 0
+        self.job = None
+        self.busy = False
+        self.ready = False
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def submit(self, delta, pressed):
+        with self.condition:
+            self.job = (delta, pressed)
+            self.busy = True
+            self.condition.notify_all()
+
+    def wait(self):
+        with self.condition:
+            while self.busy:
+                self.condition.wait()
+
+    def swap(self):
+        self.wait()
+        if self.ready:
+            self.front ^= 1
+            self.ready = False
+        return self.snapshots[self.front]
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.job is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                delta, pressed = self.job
+                self.job = None
+            back = self.snapshots[self.front ^ 1]
+            back.carry_previous(self.snapshots[self.front])
+            back.capture(self.advance(delta, pressed, back.remember))
+            with self.condition:
+                self.busy = False
+                self.ready = True
+                self.condition.notify_all()
+
+    def close(self):
+        self.wait()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
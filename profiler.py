@@ -0,0 +1,228 @@
+import collections
+import functools
+import json
+import sys
+import threading
+import time
+
+import pygame
+
+from text import FONT_PATH, font_pool
+
+SURFACE_ALLOCATING_METHODS = {"convert", "convert_alpha", "copy", "subsurface"}
+MODULE_ALLOCATING_FUNCTIONS = {"rotate", "rotozoom", "flip", "load", "frombytes", "fromstring"}
+# these take an optional surface to write into and only allocate without one, which a c_call event can't tell apart
+SCALING_FUNCTIONS = ("scale", "smoothscale", "scale_by")
+SURFACE = pygame.Surface
+HISTOGRAM_EDGES = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarise(samples):
+    ordered = sorted(samples)
+    histogram = collections.Counter()
+    for sample in ordered:
+        histogram[next((f"<{edge}" for edge in HISTOGRAM_EDGES if sample < edge), f">={HISTOGRAM_EDGES[-1]}")] += 1
+    return {
+        "samples": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else 0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0,
+        "histogram": dict(histogram),
+    }
+
+
+class Profiler:
+    window = 600
+    # blits and allocations are counted with sys.setprofile, which is slow, so only every Nth frame is counted
+    # and that frame's timings are thrown away
+    count_interval = 30
+
+    def __init__(self):
+        self.timings = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.counts = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.frame_timings = collections.Counter()
+        self.frame_counts = collections.Counter()
+        self.installed = []
+        self.frames = 0
+        self.frame_start = None
+        self.counting = False
+        # everything is recorded for this thread only, pipelined ticks on the worker would race the per-frame Counter
+        # and land in whichever frame happened to be open
+        self.frame_thread = None
+        self.time_to_first_frame = None
+        # calling a type is not a c_call either, so Surface and the scales are swapped for counting versions
+        # while a frame is counted
+        self.counters = [(pygame, "Surface", self.counted_surface())]
+        self.counters += [(pygame.transform, name, self.counted_scale(getattr(pygame.transform, name)))
+                          for name in SCALING_FUNCTIONS]
+        self.originals = []
+
+    @property
+    def is_installed(self):
+        return bool(self.installed)
+
+    def instrument(self, owner, attribute, name):
+        original = getattr(owner, attribute)
+        frame_timings = self.frame_timings
+        profiler = self
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            if threading.get_ident() != profiler.frame_thread:
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                frame_timings[name] += (time.perf_counter() - start) * 1000
+
+        setattr(owner, attribute, timed)
+        self.installed.append((owner, attribute, original))
+
+    def uninstall(self):
+        for owner, attribute, original in reversed(self.installed):
+            setattr(owner, attribute, original)
+        self.installed = []
+
+    def begin_frame(self):
+        self.frame_timings.clear()
+        self.frame_counts.clear()
+        self.counting = self.frames % self.count_interval == 0
+        self.frame_thread = threading.get_ident()
+        if self.counting:
+            self.originals = [(owner, name, getattr(owner, name)) for owner, name, _ in self.counters]
+            for owner, name, counter in self.counters:
+                setattr(owner, name, counter)
+            sys.setprofile(self.count_call)
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        frame_time = (time.perf_counter() - self.frame_start) * 1000
+        if self.counting:
+            sys.setprofile(None)
+            for owner, name, original in self.originals:
+                setattr(owner, name, original)
+            self.originals = []
+            self.counts["blits"].append(self.frame_counts["blits"])
+            self.counts["allocations"].append(self.frame_counts["allocations"])
+        else:
+            self.timings["frame"].append(frame_time)
+            for name, elapsed in self.frame_timings.items():
+                self.timings[name].append(elapsed)
+        self.frames += 1
+
+    def count_allocation(self):
+        # the swaps are global, a surface made on the splash decoder thread is not this frame's
+        if threading.get_ident() == self.frame_thread:
+            self.frame_counts["allocations"] += 1
+
+    def counted_surface(self):
+        profiler = self
+
+        class CountedSurface(SURFACE):
+
+            def __init__(self, *args, **kwargs):
+                profiler.count_allocation()
+                super().__init__(*args, **kwargs)
+
+        return CountedSurface
+
+    def counted_scale(self, scale):
+        @functools.wraps(scale)
+        def counted(surface, size, dest_surface=None):
+            if dest_surface is None:
+                self.count_allocation()
+                return scale(surface, size)
+            return scale(surface, size, dest_surface)
+
+        return counted
+
+    def count_call(self, frame, event, function):
+        if event != "c_call":
+            return
+        name = function.__name__
+        owner = getattr(function, "__self__", None)
+        if isinstance(owner, SURFACE):
+            if name in ("blit", "blits"):
+                self.frame_counts["blits"] += 1
+            elif name in SURFACE_ALLOCATING_METHODS:
+                self.frame_counts["allocations"] += 1
+        elif isinstance(owner, pygame.font.Font):
+            if name == "render":
+                self.frame_counts["allocations"] += 1
+        elif (owner is pygame.transform or owner is pygame.image) and name in MODULE_ALLOCATING_FUNCTIONS:
+            self.frame_counts["allocations"] += 1
+
+    def report(self):
+        return {
+            "frames": self.frames,
+            "time_to_first_frame_ms": self.time_to_first_frame,
+            "window": self.window,
+            "count_interval": self.count_interval,
+            "timings_ms": {name: summarise(samples) for name, samples in sorted(self.timings.items())},
+            "counts_per_frame": {name: summarise(samples) for name, samples in sorted(self.counts.items())},
+        }
+
+    def export(self, path):
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class ProfilerOverlay:
+    font_size = 12
+    refresh_interval = 250
+    padding = 4
+    background_colour = (0, 0, 0, 170)
+    text_colour = (230, 230, 230)
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.visible = False
+        self.surface = None
+        self.refresh_timer = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.refresh_timer = 0
+
+    def lines(self):
+        out = ["subsystem         p50    p95    p99 ms"]
+        for name, samples in sorted(self.profiler.timings.items()):
+            ordered = sorted(samples)
+            out.append(f"{name[:16]:<16}{percentile(ordered, 0.5):>6.2f} {percentile(ordered, 0.95):>6.2f} "
+                       f"{percentile(ordered, 0.99):>6.2f}")
+        for name, samples in sorted(self.profiler.counts.items()):
+            ordered = sorted(samples)
+            out.append(f"{name:<16}{percentile(ordered, 0.5):>6} {percentile(ordered, 0.95):>6} "
+                       f"{percentile(ordered, 0.99):>6} /frame")
+        if self.profiler.time_to_first_frame is not None:
+            out.append(f"first frame {self.profiler.time_to_first_frame:>10.1f} ms")
+        return out
+
+    def refresh(self):
+        # rebuilt a few times a second rather than every frame, the numbers would be unreadable anyway
+        font = font_pool.get(FONT_PATH, self.font_size)
+        rendered = [font.render(line, True, self.text_colour) for line in self.lines()]
+        width = max(line.get_width() for line in rendered) + 2 * self.padding
+        height = sum(line.get_height() for line in rendered) + 2 * self.padding
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.surface.fill(self.background_colour)
+        y = self.padding
+        for line in rendered:
+            self.surface.blit(line, (self.padding, y))
+            y += line.get_height()
+
+    def draw(self, surface, delta):
+        self.refresh_timer -= delta
+        if self.surface is None or self.refresh_timer <= 0:
+            self.refresh_timer = self.refresh_interval
+            self.refresh()
+        return surface.blit(self.surface, (0, 0))
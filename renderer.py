@@ -0,0 +1,133 @@
+import pygame
+
+
+def merge_moves(previous, current):
+    # both lists are one rect per object in the same order, a moving object's old and new rect mostly overlap,
+    # so their union pushes the shared part once instead of twice
+    rects = []
+    for old, new in zip(previous, current):
+        if old.colliderect(new):
+            rects.append(old.union(new))
+        else:
+            rects.extend((old, new))
+    rects.extend(previous[len(current):])
+    rects.extend(current[len(previous):])
+    return rects
+
+
+class Renderer:
+    caption_interval = 500
+    border_colour = (0, 0, 0)
+
+    def __init__(self, window, dirty_rects=False, caption="Amongus Bird", logical_size=None, integer_scaling=False):
+        self.window = window
+        self.dirty_rects = dirty_rects
+        self.caption = caption
+        self.integer_scaling = integer_scaling
+        # the game always draws at its logical size, a bigger window only costs the one scale at the end of a frame
+        if logical_size is None:
+            self.screen = window
+        else:
+            self.screen = pygame.Surface(logical_size).convert(window)
+        self.scale = 1
+        self.target_rect = window.get_rect()
+        self.target = window
+        self.scene = None
+        self.previous = []
+        self.saved_pixels = 0
+        self.total_saved_pixels = 0
+        self.skipped_scales = 0
+        self.borders_stale = False
+        self.frames = 0
+        self.caption_timer = 0
+        self.resize()
+
+    @property
+    def is_scaled(self):
+        return self.screen is not self.window
+
+    def resize(self):
+        if pygame.display.get_surface() is not None:
+            self.window = pygame.display.get_surface()
+        if not self.is_scaled:
+            return
+        width, height = self.window.get_size()
+        logical_width, logical_height = self.screen.get_size()
+        self.scale = min(width / logical_width, height / logical_height)
+        if self.scale >= 1 and (self.integer_scaling or self.scale.is_integer()):
+            self.scale = int(self.scale)
+        size = (max(1, round(logical_width * self.scale)), max(1, round(logical_height * self.scale)))
+        self.target_rect = pygame.Rect(((width - size[0]) // 2, (height - size[1]) // 2), size)
+        self.target = self.window.subsurface(self.target_rect)
+        self.window.fill(self.border_colour)
+        self.borders_stale = True
+        self.scene = None
+
+    def to_logical(self, position):
+        if not self.is_scaled:
+            return position
+        return ((position[0] - self.target_rect.x) / self.scale, (position[1] - self.target_rect.y) / self.scale)
+
+    def toggle(self):
+        self.dirty_rects = not self.dirty_rects
+        self.scene = None
+        if not self.dirty_rects:
+            pygame.display.set_caption(self.caption)
+
+    def present(self, scene, delta=0, overlay=None):
+        screen_rect = self.screen.get_rect()
+        # a new scene or mode has nothing valid on screen yet, so it always starts with a full redraw
+        if not self.dirty_rects or scene is not self.scene or not hasattr(scene, "draw_dirty"):
+            scene.draw(self.screen)
+            if overlay is not None:
+                overlay.draw(self.screen, delta)
+            self.flip()
+            self.scene = scene
+            self.previous = scene.dirty_rects() if hasattr(scene, "dirty_rects") else []
+            self.saved_pixels = 0
+            return
+
+        current, changed = scene.draw_dirty(self.screen, self.previous)
+        if overlay is not None:
+            current.append(overlay.draw(self.screen, delta))
+        rects = [rect.clip(screen_rect) for rect in merge_moves(self.previous, current) + changed]
+        rects = [rect for rect in rects if rect.width and rect.height]
+        self.flip(rects)
+        self.previous = current
+        pushed = sum(rect.width * rect.height for rect in rects)
+        self.saved_pixels = max(0, screen_rect.width * screen_rect.height - pushed)
+        self.total_saved_pixels += self.saved_pixels
+        self.frames += 1
+
+        self.caption_timer -= delta
+        if self.caption_timer <= 0:
+            self.caption_timer = self.caption_interval
+            pygame.display.set_caption(f"{self.caption} - dirty rects, {self.saved_pixels:,} px saved")
+
+    def flip(self, rects=None):
+        if not self.is_scaled:
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects)
+            return
+        if rects is not None and not rects:
+            # nothing was redrawn, so the scaled frame already in the window is still correct
+            self.skipped_scales += 1
+            return
+        if rects is None or not isinstance(self.scale, int):
+            # fractional scales sample across rect edges, only a whole-frame scale is seamless
+            pygame.transform.scale(self.screen, self.target_rect.size, self.target)
+            if self.borders_stale:
+                self.borders_stale = False
+                pygame.display.update()
+            else:
+                pygame.display.update(self.target_rect)
+            return
+        updated = []
+        for rect in rects:
+            target = pygame.Rect(rect.x * self.scale, rect.y * self.scale, rect.width * self.scale,
+                                 rect.height * self.scale)
+            pygame.transform.scale(self.screen.subsurface(rect), target.size, self.target.subsurface(target))
+            updated.append(target.move(self.target_rect.topleft))
+        pygame.display.update(updated)
@@ -0,0 +1,140 @@
+import argparse
+import os
+import struct
+import time
+
+from level import curve_from_key
+from simulation import DEFAULT_CURVE, Simulation
+
+MAGIC = b"ABRP"
+VERSION = 2
+HEADER = struct.Struct("<4sBqII")
+# the curve goes in as its key, the name then every number as a double
+CURVE = struct.Struct("<8sB")
+CURVE_VALUE = struct.Struct("<d")
+DELTA_RUN = struct.Struct("<Id")
+TOGGLE = struct.Struct("<I")
+FOOTER = struct.Struct("<qI")
+
+
+class Recorder:
+
+    def __init__(self, seed, curve=DEFAULT_CURVE):
+        self.seed = seed
+        self.curve = curve
+        # consecutive ticks with the same delta collapse into one run, SPACE is stored as the ticks where it flips
+        self.delta_runs = []
+        self.toggles = []
+        self.pressed = False
+        self.frames = 0
+        self.score = None
+
+    def record(self, delta, jump):
+        jump = bool(jump)
+        if jump != self.pressed:
+            self.toggles.append(self.frames)
+            self.pressed = jump
+        if self.delta_runs and self.delta_runs[-1][1] == delta:
+            self.delta_runs[-1][0] += 1
+        else:
+            self.delta_runs.append([1, delta])
+        self.frames += 1
+
+    def finish(self, score):
+        self.score = score
+
+    def to_bytes(self):
+        name, *values = self.curve.key()
+        out = [HEADER.pack(MAGIC, VERSION, self.seed, len(self.delta_runs), len(self.toggles)),
+               CURVE.pack(name.encode(), len(values))]
+        out.extend(CURVE_VALUE.pack(value) for value in values)
+        out.extend(DELTA_RUN.pack(count, delta) for count, delta in self.delta_runs)
+        out.extend(TOGGLE.pack(frame) for frame in self.toggles)
+        out.append(FOOTER.pack(-1 if self.score is None else self.score, self.frames))
+        return b"".join(out)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+
+class Replay:
+
+    def __init__(self, seed, delta_runs, toggles, score, frames, curve=DEFAULT_CURVE):
+        self.seed = seed
+        self.curve = curve
+        self.delta_runs = delta_runs
+        self.toggles = toggles
+        self.score = score
+        self.frames = frames
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, run_count, toggle_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not an Amongus Bird replay")
+        offset = HEADER.size
+        name, value_count = CURVE.unpack_from(data, offset)
+        offset += CURVE.size
+        values = [CURVE_VALUE.unpack_from(data, offset + i * CURVE_VALUE.size)[0] for i in range(value_count)]
+        offset += value_count * CURVE_VALUE.size
+        curve = curve_from_key((name.rstrip(b"\0").decode(),) + tuple(values))
+        delta_runs = [DELTA_RUN.unpack_from(data, offset + i * DELTA_RUN.size) for i in range(run_count)]
+        offset += run_count * DELTA_RUN.size
+        toggles = [TOGGLE.unpack_from(data, offset + i * TOGGLE.size)[0] for i in range(toggle_count)]
+        offset += toggle_count * TOGGLE.size
+        score, frames = FOOTER.unpack_from(data, offset)
+        return cls(seed, delta_runs, toggles, None if score < 0 else score, frames, curve)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    def inputs(self):
+        toggles = iter(self.toggles)
+        next_toggle = next(toggles, None)
+        pressed = False
+        frame = 0
+        for count, delta in self.delta_runs:
+            for _ in range(count):
+                if frame == next_toggle:
+                    pressed = not pressed
+                    next_toggle = next(toggles, None)
+                yield delta, pressed
+                frame += 1
+
+    def play(self):
+        simulation = Simulation(self.seed, self.curve)
+        for delta, jump in self.inputs():
+            simulation.step(delta, jump)
+        return simulation
+
+    def verify(self):
+        simulation = self.play()
+        return simulation, simulation.frames == self.frames and (self.score is None or simulation.score == self.score)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Amongus Bird runs headlessly and check their scores")
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.paths:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        simulation, matches = replay.verify()
+        elapsed = time.perf_counter() - start
+        speed = simulation.time / 1000 / elapsed if elapsed > 0 else float("inf")
+        print(f"{path}: seed {replay.seed}, {simulation.frames} frames, score {simulation.score} "
+              f"(recorded {replay.score}), {speed:.0f}x real time, {'OK' if matches else 'MISMATCH'}")
+        failed += not matches
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+import argparse
+import collections
+import functools
+import math
+import multiprocessing
+import time
+
+from scores import Run, ScoreStore
+from simulation import Player, Simulation, Wall
+
+EpisodeResult = collections.namedtuple("EpisodeResult", ["seed", "score", "frames", "survival_time", "fps"])
+
+
+def follow_hole(simulation):
+    wall = simulation.next_wall()
+    target = wall.hole_y + (wall.hole_height + Wall.y) / 2 if wall is not None else Simulation.start_y
+    player = simulation.player
+    if player.no_jump == 0:
+        return True
+    return player.y > target + Player.crop and player.velocity_y > 0
+
+
+def play_episode(controller, seed, delta=Simulation.tick_length, max_frames=120000):
+    simulation = Simulation(seed)
+    start = time.perf_counter()
+    while simulation.frames < max_frames and simulation.step(delta, controller(simulation)):
+        pass
+    elapsed = time.perf_counter() - start
+    return EpisodeResult(seed, simulation.score, simulation.frames, simulation.time,
+                         simulation.frames / elapsed if elapsed > 0 else math.inf)
+
+
+def play_episodes(controller, seeds, delta, max_frames):
+    return [play_episode(controller, seed, delta, max_frames) for seed in seeds]
+
+
+def evaluate(controller, seeds, workers=None, delta=Simulation.tick_length, max_frames=120000, chunk_size=16):
+    seeds = list(seeds)
+    workers = workers or multiprocessing.cpu_count()
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+    play = functools.partial(play_episodes, controller, delta=delta, max_frames=max_frames)
+    if workers == 1:
+        batches = map(play, chunks)
+        return merge(batches)
+    with multiprocessing.Pool(workers) as pool:
+        return merge(pool.imap_unordered(play, chunks))
+
+
+def merge(batches):
+    # workers finish in any order, sorting by seed keeps the merged numbers independent of the worker count
+    return sorted((result for batch in batches for result in batch), key=lambda result: result.seed)
+
+
+def summarise(results):
+    scores = sorted(result.score for result in results)
+    frames = sum(result.frames for result in results)
+    return {
+        "episodes": len(results),
+        "mean_score": sum(scores) / len(scores),
+        "median_score": scores[len(scores) // 2],
+        "max_score": scores[-1],
+        "mean_survival_time": sum(result.survival_time for result in results) / len(results),
+        "frames": frames,
+        "frames_per_second": frames / sum(result.frames / result.fps for result in results),
+    }
+
+
+def record(results, path):
+    store = ScoreStore(path)
+    try:
+        for result in results:
+            store.record(Run(result.seed, result.score, result.frames, result.survival_time,
+                             result.frames / result.fps, 1000 / result.fps, None, "runner"))
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play seeded headless games of Amongus Bird across all cores")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--delta", type=float, default=Simulation.tick_length)
+    parser.add_argument("--max-frames", type=int, default=120000)
+    parser.add_argument("--store", help="also record every episode in this score database")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = evaluate(follow_hole, range(args.first_seed, args.first_seed + args.episodes), args.workers,
+                       args.delta, args.max_frames)
+    elapsed = time.perf_counter() - start
+    for key, value in summarise(results).items():
+        print(f"{key}: {value}")
+    print(f"wall_time: {elapsed:.2f}s")
+    if args.store:
+        record(results, args.store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import collections
+import logging
+import sqlite3
+import threading
+import time
+
+Run = collections.namedtuple("Run", ["seed", "score", "frames", "survival_time", "duration", "mean_frame_time",
+                                     "p95_frame_time", "source"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    seed INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    survival_time REAL NOT NULL,
+    duration REAL,
+    mean_frame_time REAL,
+    p95_frame_time REAL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score);
+CREATE INDEX IF NOT EXISTS runs_by_source_score ON runs (source, score);
+"""
+logger = logging.getLogger(__name__)
+INSERT = ("INSERT INTO runs (finished_at, seed, score, frames, survival_time, duration, mean_frame_time, "
+          "p95_frame_time, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def connect(path, timeout):
+    # WAL lets readers carry on while another process writes, the timeout makes concurrent writers queue up
+    connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ScoreStore:
+    batch_size = 64
+    flush_interval = 2.0
+    timeout = 30.0
+    # a batch that still can't be written when the store closes is tried this many times before it is given up on
+    close_attempts = 2
+    # runner.py writes bot runs into the same table, the high score shown to the player only counts their own games
+    player_source = "game"
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = []
+        self.writing = False
+        self.best = 0
+        self.closed = False
+        self.failed = False
+        self.condition = threading.Condition()
+        self.loaded = threading.Event()
+        self.reader = None
+        if path is None:
+            self.loaded.set()
+            self.writer = None
+            return
+        # the file is opened and read on the writer thread, so the frame thread never waits on the disk
+        self.writer = threading.Thread(target=self.write_batches, name="score-writer", daemon=True)
+        self.writer.start()
+
+    def highest(self):
+        self.loaded.wait()
+        return self.best
+
+    def is_stored(self):
+        self.loaded.wait()
+        return self.writer is not None and not self.failed
+
+    def record(self, run):
+        with self.condition:
+            if run.source == self.player_source:
+                self.best = max(self.best, run.score)
+            if self.writer is None or self.failed:
+                return
+            self.pending.append((time.time(),) + tuple(run))
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+
+    def write_batches(self):
+        try:
+            connection = connect(self.path, self.timeout)
+            best = connection.execute("SELECT MAX(score) FROM runs WHERE source = ?",
+                                      (self.player_source,)).fetchone()[0]
+            with self.condition:
+                self.best = max(self.best, best or 0)
+        except (sqlite3.Error, OSError) as error:
+            # the game carries on with the best score in memory, runs stop queueing for a file that can't take them
+            logger.error("can't open the score database %s, scores won't be saved: %s", self.path, error)
+            with self.condition:
+                self.failed = True
+                self.pending = []
+                self.condition.notify_all()
+            return
+        finally:
+            self.loaded.set()
+        attempts = 0
+        while True:
+            with self.condition:
+                if not self.closed and len(self.pending) < self.batch_size:
+                    self.condition.wait(self.flush_interval)
+                batch, self.pending = self.pending, []
+                self.writing = bool(batch)
+                closed = self.closed
+            try:
+                if batch:
+                    with connection:
+                        connection.execute("BEGIN IMMEDIATE")
+                        connection.executemany(INSERT, batch)
+                attempts = 0
+            except sqlite3.OperationalError as error:
+                # still locked after the timeout, the batch goes back to the front of the queue for the next round
+                attempts += 1
+                if attempts == 1:
+                    logger.warning("couldn't write %d runs to %s, retrying: %s", len(batch), self.path, error)
+                with self.condition:
+                    self.pending[:0] = batch
+                    if closed and attempts >= self.close_attempts:
+                        logger.error("gave up on %d runs that couldn't be written to %s: %s", len(self.pending),
+                                     self.path, error)
+                        self.pending = []
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+                finished = closed and not self.pending
+            if finished:
+                connection.close()
+                return
+
+    def flush(self):
+        if self.writer is None:
+            return
+        with self.condition:
+            self.condition.notify_all()
+            while (self.pending or self.writing) and self.writer.is_alive():
+                self.condition.wait(self.flush_interval)
+
+    def close(self):
+        if self.writer is None:
+            return
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.writer.join()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def query(self, sql, parameters=()):
+        self.flush()
+        if self.reader is None:
+            self.reader = connect(self.path, self.timeout)
+        return self.reader.execute(sql, parameters).fetchall()
+
+    def top(self, count=10, source=None):
+        if not self.is_stored():
+            return []
+        if source is None:
+            return self.query("SELECT seed, score, frames, survival_time FROM runs ORDER BY score DESC LIMIT ?",
+                              (count,))
+        return self.query("SELECT seed, score, frames, survival_time FROM runs WHERE source = ? "
+                          "ORDER BY score DESC LIMIT ?", (source, count))
+
+    def count(self):
+        if not self.is_stored():
+            return 0
+        return self.query("SELECT COUNT(*) FROM runs")[0][0]
+
+    def percentile(self, fraction):
+        # walks the score index straight to the row instead of pulling every score into Python
+        count = self.count()
+        if count == 0:
+            return 0
+        offset = min(count - 1, int(fraction * count))
+        return self.query("SELECT score FROM runs ORDER BY score LIMIT 1 OFFSET ?", (offset,))[0][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the best Amongus Bird runs and the score distribution")
+    parser.add_argument("path", nargs="?", default="scores.sqlite3")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--source", help="only runs from this source, game or runner")
+    args = parser.parse_args()
+
+    store = ScoreStore(args.path)
+    try:
+        for rank, (seed, score, frames, survival_time) in enumerate(store.top(args.top, args.source), 1):
+            print(f"{rank:>3}. {score:>6} seed {seed}, {frames} frames, {survival_time / 1000:.1f} s")
+        print(f"{store.count()} runs, p50 {store.percentile(0.5)}, p90 {store.percentile(0.9)}, "
+              f"p99 {store.percentile(0.99)}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
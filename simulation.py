@@ -0,0 +1,226 @@
+import math
+import random
+
+from collision import Rect, SweepIndex
+from level import Constant, LevelStream, course_cache
+
+SCREEN_HEIGHT = 480
+SCREEN_WIDTH = 540
+
+
+class Player:
+    __slots__ = ("x", "y", "velocity_x", "velocity_y", "jump_cooldown", "collision_rect", "no_jump")
+    width = 40
+    height = 40
+    gravity = 0.0180
+    jump_strength = 0.35
+    speed = 0.215
+    jump_cooldown_length = 0
+    sprite_width = 16
+    crop = 2 * 40 / sprite_width * 1.75
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.velocity_x = 0
+        self.velocity_y = 0
+        self.jump_cooldown = 200
+        self.collision_rect = Rect(self.x - self.width / 2, self.y - self.height / 2 + self.crop, self.width,
+                                   self.height - 2 * self.crop)
+        self.no_jump = 0
+
+    def update(self, delta, jump, index):
+        self.velocity_x *= self.no_jump
+        self.velocity_y *= self.no_jump
+        self.jump_cooldown -= delta
+
+        if jump and self.jump_cooldown <= 0:
+            self.jump()
+
+        if self.is_out_of_bounds():
+            return False
+
+        self.x += self.velocity_x * delta
+        self.update_collision_rect()
+        for wall in index.query(self.collision_rect):
+            for collision_rect in wall.collision_rects:
+                if collision_rect.colliderect(self.collision_rect):
+                    if self.x < wall.x + wall.width:
+                        self.x = wall.x - self.width
+                    else:
+                        self.x = wall.x + wall.width + self.width
+                    self.velocity_x *= -1
+                    return False
+        self.y += self.velocity_y * delta
+        self.update_collision_rect()
+        for wall in index.query(self.collision_rect):
+            for collision_rect in wall.collision_rects:
+                if collision_rect.colliderect(self.collision_rect):
+                    if self.y < collision_rect.y + collision_rect.height:
+                        self.y = collision_rect.y - self.height
+                    else:
+                        self.y = collision_rect.y + collision_rect.height + self.height
+                    self.velocity_y *= -1
+                    return False
+
+        self.velocity_y += self.gravity
+        return True
+
+    def is_out_of_bounds(self):
+        if self.y + self.height < 0 or self.y - self.height > SCREEN_HEIGHT:
+            return True
+        return False
+
+    def update_collision_rect(self):
+        self.collision_rect.update(self.x - self.width / 2, self.y - self.height / 2 + self.crop, self.width,
+                                   self.height - 2 * self.crop)
+
+    def jump(self):
+        self.no_jump = 1
+        self.velocity_y = -self.jump_strength
+        self.jump_cooldown = self.jump_cooldown_length
+
+
+class Wall:
+    __slots__ = ("x", "hole_y", "hole_height", "spacing", "collision_rects", "score_award", "index", "resets")
+    default_hole_height = Player.height * 1.5
+    width = Player.width
+    end_pipe_height = Player.width
+    min_hole_y = round(default_hole_height * 0.5) + end_pipe_height + Player.height
+    max_hole_y = round(SCREEN_HEIGHT - default_hole_height * 1.5)
+    y = -Player.height
+
+    def __init__(self, x, hole_y, hole_height, spacing):
+        self.x = x
+        self.hole_y = hole_y
+        self.hole_height = hole_height
+        # distance to the wall that follows this one in the course
+        self.spacing = spacing
+        self.collision_rects = (Rect(self.x, self.y, self.width, self.hole_y),
+                                Rect(self.x, self.hole_y + self.hole_height, self.width,
+                                     SCREEN_HEIGHT - (self.hole_y + self.hole_height) + self.end_pipe_height))
+        self.score_award = 1
+        # counts respawns, so a view can tell a teleport from a fast move without guessing from the distance
+        self.resets = 0
+
+    @classmethod
+    def hole_range(cls, hole_height):
+        return (round(hole_height * 0.5) + cls.end_pipe_height + Player.height,
+                round(SCREEN_HEIGHT - hole_height * 1.5))
+
+    def update(self, delta, x):
+        self.x -= x * delta
+        self.collision_rects[0].update(self.x, self.y, self.width, self.hole_y)
+        self.collision_rects[1].update(self.x, self.hole_y + self.hole_height, self.width,
+                                       SCREEN_HEIGHT - (self.hole_y + self.hole_height) + Player.height)
+
+    def reset(self, segment, offset):
+        self.x += offset
+        self.hole_y = segment.hole_y
+        self.hole_height = segment.hole_height
+        self.spacing = segment.spacing
+        self.score_award = 1
+        self.resets += 1
+
+    def award_score(self):
+        award = self.score_award
+        self.score_award = 0
+        return award
+
+
+class WallManager:
+    __slots__ = ("stream", "walls", "span", "index", "needs_resort")
+    wall_separation_distance = SCREEN_WIDTH / 2
+    starting_position = SCREEN_WIDTH * 1.1
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.walls = []
+        # distance from the first wall on the course to where the next one spawns, a passed wall moves forward by it
+        self.span = 0
+        for _ in range(self.wall_count(stream.curve)):
+            segment = self.stream.next()
+            self.walls.append(Wall(self.starting_position + self.span, segment.hole_y, segment.hole_height,
+                                   segment.spacing))
+            self.span += segment.spacing
+        self.index = SweepIndex(self.walls, Wall.width)
+        self.needs_resort = False
+
+    @staticmethod
+    def wall_count(curve):
+        # a passed wall moves forward by every spacing put together, there have to be enough walls for that to
+        # land it past the right edge even where the curve packs them closest
+        spacing = curve.min_spacing()
+        if spacing <= 0:
+            raise ValueError("walls need a spacing above 0")
+        return max(2, math.floor(SCREEN_WIDTH * 2 / spacing))
+
+    def update(self, delta, slow_down_effect, player):
+        score = 0
+        was_reset = False
+        for wall in self.walls:
+            wall.update(delta, Player.speed * slow_down_effect * player.no_jump)
+            if wall.x + wall.width < 0:
+                spacing = wall.spacing
+                wall.reset(self.stream.next(), self.span)
+                self.span += wall.spacing - spacing
+                was_reset = True
+            if player.x > wall.x + wall.width:
+                score += wall.award_score()
+        # Wall.reset leaves the rects where they were until the next update moves them
+        if self.needs_resort:
+            self.index.resort()
+        self.needs_resort = was_reset
+        return score
+
+
+DEFAULT_CURVE = Constant(Wall.default_hole_height, WallManager.wall_separation_distance)
+
+
+def precompute_course(seed, length, curve=DEFAULT_CURVE):
+    return course_cache.get(seed, curve, Wall.hole_range, length)
+
+
+class Simulation:
+    __slots__ = ("seed", "curve", "wall_manager", "player", "score", "is_game_over", "is_finished", "slow_down_effect",
+                 "frames", "time")
+    tick_length = 1000 / 120
+    start_x = SCREEN_WIDTH / 2
+    start_y = SCREEN_HEIGHT / 2
+
+    def __init__(self, seed=None, curve=DEFAULT_CURVE, course=None):
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.curve = curve
+        self.wall_manager = WallManager(LevelStream(seed, curve, Wall.hole_range, course))
+        self.player = Player(self.start_x, self.start_y)
+        self.score = 0
+        self.is_game_over = False
+        self.is_finished = False
+        self.slow_down_effect = 1.0
+        self.frames = 0
+        self.time = 0
+
+    def step(self, delta, jump=False):
+        self.score += self.wall_manager.update(delta, self.slow_down_effect, self.player)
+        if not self.player.update(delta, jump and not self.is_game_over, self.wall_manager.index):
+            if not self.is_game_over:
+                self.game_over()
+        if self.is_game_over:
+            self.slow_down_effect /= delta
+            if self.player.is_out_of_bounds():
+                self.is_finished = True
+        self.frames += 1
+        self.time += delta
+        return not self.is_finished
+
+    def next_wall(self):
+        ahead = [wall for wall in self.wall_manager.walls if wall.x + wall.width > self.player.x - Player.width / 2]
+        if not ahead:
+            return None
+        return min(ahead, key=lambda wall: wall.x)
+
+    def game_over(self):
+        self.player.velocity_x = -Player.speed
+        self.is_game_over = True
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import struct
+import threading
+import zlib
+
+import pygame
+
+from assets import Assets
+
+MAGIC = b"ABSP"
+VERSION = 1
+HEADER = struct.Struct("<4sBI16s")
+FRAME = struct.Struct("<HH?iI")
+
+
+def index_frames(path, prefix="bruh", extension=".png"):
+    numbers = []
+    for file in os.listdir(path):
+        if file.startswith(prefix) and file.endswith(extension):
+            numbers.append(int(file[len(prefix):-len(extension)]))
+    return [os.path.join(path, f"{prefix}{number}{extension}") for number in sorted(numbers)]
+
+
+def signature(files):
+    digest = hashlib.md5()
+    for file in files:
+        stat = os.stat(file)
+        digest.update(f"{os.path.basename(file)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.digest()
+
+
+class SplashFrames:
+    cache_size = 6
+
+    def __init__(self, path, scale, pack_path=None):
+        self.files = index_frames(path)
+        self.scale = scale
+        self.pack_path = pack_path
+        self.signature = signature(self.files)
+        self.packed = self.read_pack()
+        # raw frames are kept compressed until every one has been seen, then written out as the pack
+        self.raw = [None] * len(self.files)
+        self.frames = {}
+        self.decoded = set()
+        self.converted = set()
+        self.wanted = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.decode_ahead, name="splash-decoder", daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return len(self.files)
+
+    def read_pack(self):
+        if self.pack_path is None or not os.path.exists(self.pack_path):
+            return None
+        with open(self.pack_path, "rb") as file:
+            data = file.read()
+        try:
+            magic, version, count, packed_signature = HEADER.unpack_from(data)
+        except struct.error:
+            return None
+        if magic != MAGIC or version != VERSION or count != len(self.files) or packed_signature != self.signature:
+            return None
+        packed = []
+        offset = HEADER.size
+        for _ in range(count):
+            width, height, alpha, colorkey, length = FRAME.unpack_from(data, offset)
+            offset += FRAME.size
+            packed.append((width, height, alpha, colorkey, data[offset:offset + length]))
+            offset += length
+        return packed
+
+    def write_pack(self):
+        directory = os.path.dirname(self.pack_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        out = [HEADER.pack(MAGIC, VERSION, len(self.files), self.signature)]
+        for width, height, alpha, colorkey, data in self.raw:
+            out.append(FRAME.pack(width, height, alpha, colorkey, len(data)))
+            out.append(data)
+        temporary = self.pack_path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(b"".join(out))
+        os.replace(temporary, self.pack_path)
+
+    def decode(self, index):
+        if self.packed is not None:
+            width, height, alpha, colorkey, data = self.packed[index]
+            surface = pygame.image.frombytes(zlib.decompress(data), (width, height), "RGBA" if alpha else "RGB")
+            if colorkey >= 0:
+                surface.set_colorkey(((colorkey >> 16) & 255, (colorkey >> 8) & 255, colorkey & 255))
+        else:
+            surface = pygame.image.load(self.files[index])
+            if self.pack_path is not None:
+                alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+                colorkey = surface.get_colorkey()
+                colorkey = -1 if colorkey is None else colorkey[0] << 16 | colorkey[1] << 8 | colorkey[2]
+                self.raw[index] = (surface.get_width(), surface.get_height(), alpha, colorkey,
+                                   zlib.compress(pygame.image.tobytes(surface, "RGBA" if alpha else "RGB")))
+        return pygame.transform.scale(surface, (surface.get_width() * self.scale, surface.get_height() * self.scale))
+
+    def decode_ahead(self):
+        while True:
+            with self.condition:
+                while not self.closed and self.next_missing() is None:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                index = self.next_missing()
+            frame = self.decode(index)
+            with self.condition:
+                self.frames[index] = frame
+                self.decoded.add(index)
+                self.condition.notify_all()
+            if len(self.decoded) == len(self.files):
+                if self.packed is None and self.pack_path is not None:
+                    try:
+                        self.write_pack()
+                    except OSError:
+                        pass
+                return
+
+    def next_missing(self):
+        for index in range(self.wanted, min(self.wanted + self.cache_size, len(self.files))):
+            if index not in self.decoded:
+                return index
+        return None
+
+    def get(self, index):
+        with self.condition:
+            if index != self.wanted:
+                self.wanted = index
+                for old in [old for old in self.frames if old < index]:
+                    del self.frames[old]
+                self.condition.notify_all()
+            while index not in self.frames and index not in self.decoded and self.thread.is_alive():
+                self.condition.wait(0.1)
+            frame = self.frames.get(index)
+            if frame is not None and index in self.converted:
+                return frame
+        if frame is None:
+            frame = self.decode(index)
+        frame = Assets.convert(frame)
+        with self.condition:
+            self.frames[index] = frame
+            self.converted.add(index)
+        return frame
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
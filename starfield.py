@@ -0,0 +1,115 @@
+import random
+
+import numpy as np
+import pygame
+
+
+class Star:
+    __slots__ = ("field", "index")
+
+    def __init__(self, field, index):
+        self.field = field
+        self.index = index
+
+    @property
+    def position(self):
+        return pygame.Vector2(self.field.x[self.index], self.field.y[self.index])
+
+    @property
+    def radius(self):
+        return self.field.radius[self.index]
+
+    @property
+    def colour(self):
+        brightness = int(self.field.brightness[self.index])
+        return [brightness, brightness, brightness]
+
+
+class StarField:
+    min_brightness = 105
+    max_brightness = 255
+    brightness_step = 5
+    # stars re-checked per frame, so a bigger window means slower twinkle refresh rather than a slower frame
+    update_budget = 96
+    key_colour = (0, 0, 0)
+
+    def __init__(self, width, height, background_colour, count, max_star_size, rng=random):
+        self.width = width
+        self.height = height
+        self.background_colour = background_colour
+        self.x = np.array([rng.random() * width for _ in range(count)])
+        self.y = np.array([rng.random() * height for _ in range(count)])
+        self.radius = np.array([rng.random() * max_star_size / 2 for _ in range(count)])
+        self.n = np.array([rng.random() * 365000 for _ in range(count)])
+        # pygame.draw.circle truncates both the centre and the radius, the sprites are baked the same way
+        self.pixel_radius = self.radius.astype(np.int8)
+        self.left = self.x.astype(np.int32) - self.pixel_radius
+        self.top = self.y.astype(np.int32) - self.pixel_radius
+        self.visible = np.nonzero(self.pixel_radius > 0)[0]
+        self.sprites = {radius: self.bake_sprites(radius) for radius in np.unique(self.pixel_radius[self.visible])}
+        self.brightness = self.compute_brightness(self.n)
+        self.cursor = 0
+        self.layer = None
+        self.changed_rects = []
+
+    def __len__(self):
+        return len(self.n)
+
+    def __iter__(self):
+        return (Star(self, i) for i in range(len(self)))
+
+    def bake_sprites(self, radius):
+        sprites = {}
+        for brightness in range(self.min_brightness, self.max_brightness + 1, self.brightness_step):
+            sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1))
+            sprite.fill(self.key_colour)
+            pygame.draw.circle(sprite, (brightness, brightness, brightness), (radius, radius), radius)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            sprite.set_colorkey(self.key_colour, pygame.RLEACCEL)
+            sprites[brightness] = sprite
+        return sprites
+
+    def compute_brightness(self, n):
+        brightness = np.rint(75 * np.sin(n / 1000) + 180)
+        steps = np.rint((brightness - self.min_brightness) / self.brightness_step)
+        brightness = self.min_brightness + steps * self.brightness_step
+        return brightness.astype(np.uint8)
+
+    def sprite_blits(self, indices):
+        return [(self.sprites[self.pixel_radius[i]][self.brightness[i]], (self.left[i], self.top[i])) for i in indices]
+
+    def bake_layer(self):
+        self.layer = pygame.Surface((self.width, self.height))
+        if pygame.display.get_surface() is not None:
+            self.layer = self.layer.convert()
+        self.layer.fill(self.background_colour)
+        self.brightness = self.compute_brightness(self.n)
+        self.layer.blits(self.sprite_blits(self.visible), doreturn=False)
+
+    def update(self, delta):
+        self.n += delta
+        if self.layer is None or not len(self.visible):
+            return
+        count = min(self.update_budget, len(self.visible))
+        chunk = self.visible.take(range(self.cursor, self.cursor + count), mode="wrap")
+        self.cursor = (self.cursor + count) % len(self.visible)
+        brightness = self.compute_brightness(self.n[chunk])
+        changed = chunk[brightness != self.brightness[chunk]]
+        self.brightness[chunk] = brightness
+        self.changed_rects.extend(self.layer.blits(self.sprite_blits(changed)))
+
+    def take_changed_rects(self):
+        rects = self.changed_rects
+        self.changed_rects = []
+        return rects
+
+    def draw(self, surface, rects=None):
+        if self.layer is None or rects is None:
+            if self.layer is None:
+                self.bake_layer()
+            self.changed_rects = []
+            surface.blit(self.layer, (0, 0))
+            return
+        surface.blits([(self.layer, rect, rect) for rect in rects], doreturn=False)
+
@@ -0,0 +1,48 @@
+import collections
+import os
+
+import pygame
+
+# anchored to this file, so the font is found whatever directory the game or an importer runs from
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "textures", "MontserratBlack-ZVK6J.otf")
+
+
+class FontPool:
+
+    def __init__(self):
+        self.fonts = {}
+
+    def get(self, path, size):
+        font = self.fonts.get((path, size))
+        if font is None:
+            font = pygame.font.Font(path, size)
+            self.fonts[(path, size)] = font
+        return font
+
+
+class TextCache:
+
+    def __init__(self, font_pool, max_size=256):
+        self.font_pool = font_pool
+        self.max_size = max_size
+        self.surfaces = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, path, size, text, antialias, colour):
+        key = (path, size, text, antialias, tuple(colour))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.font_pool.get(path, size).render(text, antialias, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+font_pool = FontPool()
+text_cache = TextCache(font_pool)